@@ -12,4 +12,19 @@ formatter = logging.Formatter('%(asctime)s[%(levelname)s][%(filename)s:%(lineno)
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
+
+def isLogged(level):
+    #the logger accepts all levels and leaves the filtering to its handlers, check them before building expensive messages
+    if not logger.isEnabledFor(level):
+        return False
+    curlogger = logger
+    while curlogger != None:
+        for h in curlogger.handlers:
+            if level >= h.level:
+                return True
+        if not curlogger.propagate:
+            break
+        curlogger = curlogger.parent
+    return False
+
 __version__ = "1.0.3"
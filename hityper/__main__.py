@@ -2,14 +2,17 @@ import argparse
 import subprocess
 import ast
 import os
+import glob
 import json
 import traceback
-from hityper.tdg_generator import TDGGenerator
-from hityper.usertype_finder import UsertypeFinder
-from hityper.utils import formatUserTypes, getRecommendations, test_multiplefile, transformDataset, collectUserTypeset
+from hityper.tdg_binary import saveTDG, setTDGCacheDir, buildTDG
+from hityper.usertype_finder import UsertypeFinder, setModuleCacheDir
+from hityper.module_summary import setSummaryCacheDir, loadImportedSummaries, summarizeModule, saveModuleSummary
+from hityper.utils import formatUserTypes, getRecommendations, test_multiplefile, transformDataset, collectUserTypeset, inferfiles, dumpstream, newEvalData, mergeEvalData, reportEvalData
 from hityper.config import config
+from hityper.cache import pruneCache
 from hityper import logger
-from hityper.utils import detectChange, SimModel
+from hityper.utils import detectChange, SimModel, setRecommendationCacheDir
 import logging
 from tqdm import tqdm
 
@@ -22,17 +25,33 @@ def setuplogs(repo):
     formatter = logging.Formatter('%(asctime)s[%(levelname)s][%(filename)s:%(lineno)d] %(message)s')
     fh.setFormatter(formatter)
     logger.addHandler(fh)
+
+def setupcache(repo):
+    #cache directories are created when the first entry is cached, and the least recently used entries are removed when they exceed cache_size
+    if config["usertype_cache"] != None:
+        setModuleCacheDir(os.path.join(repo, config["usertype_cache"]))
+        pruneCache(os.path.join(repo, config["usertype_cache"]), config["cache_size"])
+    if config["tdg_cache"] != None:
+        setTDGCacheDir(os.path.join(repo, config["tdg_cache"]))
+        pruneCache(os.path.join(repo, config["tdg_cache"]), config["cache_size"])
+    if config["recommendation_cache"] != None:
+        setRecommendationCacheDir(os.path.join(repo, config["recommendation_cache"]))
+        pruneCache(os.path.join(repo, config["recommendation_cache"]), config["cache_size"])
+    if config["summary_cache"] != None:
+        setSummaryCacheDir(os.path.join(repo, config["summary_cache"]))
+        pruneCache(os.path.join(repo, config["summary_cache"]), config["cache_size"])
     
 
 
 def findusertype(args):
     outputrepo = args.output_directory if args.output_directory else "."
     setuplogs(outputrepo)
+    setupcache(outputrepo)
     if args.groundtruth:
         if args.repo:
-            outfile = collectUserTypeset(args.groundtruth, filerepo = args.repo, cores = args.core, outputdir = outputrepo)
+            outfile = collectUserTypeset(args.groundtruth, filerepo = args.repo, cores = args.core, outputdir = outputrepo, stream = args.stream)
         else:
-            outfile = collectUserTypeset(args.groundtruth, cores = args.core, outputdir = outputrepo)
+            outfile = collectUserTypeset(args.groundtruth, cores = args.core, outputdir = outputrepo, stream = args.stream)
         logger.info("Saved collected user-defined types to {}.".format(outfile))
     elif args.repo:
         if args.source:
@@ -75,6 +94,7 @@ def gentdg(args):
             return 
         outputrepo = args.output_directory if args.output_directory else "."
         setuplogs(outputrepo)
+        setupcache(outputrepo)
         if args.source:
             if not os.path.isfile(args.source):
                 logger.error("Cannot find source file {}".format(args.source))
@@ -83,12 +103,14 @@ def gentdg(args):
                 root = ast.parse(source)
                 usertypefinder = UsertypeFinder(args.source, args.repo, True)
                 usertypes, _ = usertypefinder.run(root)
-                generator = TDGGenerator(args.source, args.optimize, [args.location], usertypes, alias = 1 if args.alias_analysis else 0, repo = args.repo if args.call_analysis else None)
-                global_tg = generator.run(root)
+                global_tg = buildTDG(args.source, source, usertypes, args.optimize, [args.location], alias = 1 if args.alias_analysis else 0, repo = args.repo if args.call_analysis else None, root = root)
                 if args.output_format == "json":
                     with open(outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_TDG.json"), "w", encoding = "utf-8") as of:
                         of.write(json.dumps(global_tg.dump(), sort_keys=True, indent=4, separators=(',', ': ')))
                         logger.info("Saved TDGs to {}".format(outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_TDG.json")))
+                elif args.output_format == "bin":
+                    saveTDG(global_tg, outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_TDG.bin"))
+                    logger.info("Saved TDGs to {}".format(outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_TDG.bin")))
                 else:
                     for tg in global_tg.tgs:
                         tg.draw(filerepo = outputrepo)
@@ -106,8 +128,7 @@ def gentdg(args):
                         root = ast.parse(source)
                         usertypefinder = UsertypeFinder(f, args.repo, True)
                         usertypes, _ = usertypefinder.run(root)
-                        generator = TDGGenerator(f, args.optimize, [args.location], usertypes, alias = 1 if args.alias_analysis else 0, repo = args.repo if args.call_analysis else None)
-                        global_tg = generator.run(root)
+                        global_tg = buildTDG(f, source, usertypes, args.optimize, [args.location], alias = 1 if args.alias_analysis else 0, repo = args.repo if args.call_analysis else None, root = root)
                     except Exception as e:
                         traceback.print_exc()
                         logger.error("Failed to generate TDG for file {}, reason: {}".format(f, e))
@@ -115,6 +136,9 @@ def gentdg(args):
                         with open(outputrepo + "/" + f.replace("/", "_").replace(".py", "_TDG.json"), "w", encoding = "utf-8") as of:
                             of.write(json.dumps(global_tg.dump(), sort_keys=True, indent=4, separators=(',', ': ')))
                             logger.info("Saved TDGs to {}".format(outputrepo + "/" + f.replace("/", "_").replace(".py", "_TDG.json")))
+                    elif args.output_format == "bin":
+                        saveTDG(global_tg, outputrepo + "/" + f.replace("/", "_").replace(".py", "_TDG.bin"))
+                        logger.info("Saved TDGs to {}".format(outputrepo + "/" + f.replace("/", "_").replace(".py", "_TDG.bin")))
                     else:
                         for tg in global_tg.tgs:
                             tg.draw(filerepo = outputrepo)
@@ -130,6 +154,7 @@ def infertypes(args):
             return 
         outputrepo = args.output_directory if args.output_directory else "."
         setuplogs(outputrepo)
+        setupcache(outputrepo)
         if args.recommendations and os.path.isfile(args.recommendations):
             with open(args.recommendations, "r", encoding = "utf-8") as mf:
                 recommendations = json.loads(mf.read())
@@ -147,31 +172,31 @@ def infertypes(args):
                 root = ast.parse(source)
                 usertypefinder = UsertypeFinder(args.source, args.repo, True)
                 usertypes, _ = usertypefinder.run(root)
-                generator = TDGGenerator(args.source, True, [args.location], usertypes, alias = 0, repo = None)
-                global_tg = generator.run(root)
+                global_tg = buildTDG(args.source, source, usertypes, True, [args.location], alias = 0, repo = None, root = root)
+                global_tg.importedsummaries = loadImportedSummaries(args.source, args.repo, root)
                 str_results = {}
                 if recommendations == None and args.type4py:
                     recommendations = getRecommendations(source)
                 elif isinstance(recommendations, dict) and args.source in recommendations:
                     recommendations = recommendations[args.source]
                 if recommendations != None:
-                    global_tg.passTypes(debug = False)
+                    global_tg.passTypes(debug = False, incremental = True)
                     global_tg.recommendType(recommendations, formatUserTypes(usertypes), usertypes["module"], args.topn, simmodel = simmodel)
-                    global_tg.passTypes(debug = False)
+                    global_tg.passTypes(debug = False, incremental = True)
                 else:
                     global_tg.passTypes(debug = False)
                 global_tg.simplifyTypes()
                 str_results["global@global"] = global_tg.dumptypes()
-                for tg in global_tg.tgs:
+                for tg in global_tg.scheduleTGs():
                     if recommendations != None:
                         changed = True
                         iters = 0
                         while changed and iters < config["max_recommendation_iteration"]:
                             iters += 1
-                            tg.passTypes(debug = False)
+                            tg.passTypes(debug = False, incremental = True)
                             types = tg.findHotTypes()
                             tg.recommendType(types, recommendations, formatUserTypes(usertypes), usertypes["module"], args.topn, simmodel = simmodel)
-                            tg.passTypes(debug = False)
+                            tg.passTypes(debug = False, incremental = True)
                             new_types = tg.findHotTypes()
                             changed = detectChange(types, new_types)
                             tg.simplifyTypes()
@@ -179,6 +204,8 @@ def infertypes(args):
                         tg.passTypes(debug = False)
                         tg.simplifyTypes()
                     str_results[tg.name] = tg.dumptypes()
+                if args.location == None:
+                    saveModuleSummary(source, summarizeModule(global_tg), global_tg.importedsummaries.summaries)
                 with open(outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_INFERREDTYPES.json"), "w", encoding = "utf-8") as of:
                     of.write(json.dumps(str_results, sort_keys=True, indent=4, separators=(',', ': ')))
                 logger.info("Saved results to {}".format(outputrepo + "/" + args.source.replace("/", "_").replace(".py", "_INFERREDTYPES.json")))
@@ -187,57 +214,79 @@ def infertypes(args):
                 logger.error("Type inference failed for file {}, reason: {}".format(args.source, e))
         if not args.source:
             files = bytes.decode(subprocess.check_output(["find", args.repo, "-name", "*.py"])).split("\n")
-            results = {}
-            for f in tqdm(files):
-                if os.path.isfile(f):
-                    try:
-                        source = open(f, "r", encoding = "utf-8").read()
-                        root = ast.parse(source)
-                        usertypefinder = UsertypeFinder(f, args.repo, True)
-                        usertypes, _ = usertypefinder.run(root)
-                        generator = TDGGenerator(f, True, None, usertypes, alias = 0, repo = None)
-                        global_tg = generator.run(root)
-                        str_results = {}
-                        global_tg.passTypes(debug = False)
-                        str_results["global@global"] = global_tg.dumptypes()
-                        single_recommendations = None
-                        if recommendations == None and args.type4py:
-                            single_recommendations = getRecommendations(source)
-                        elif isinstance(recommendations, dict) and f in recommendations:
-                            single_recommendations = recommendations[f]
-                        for tg in global_tg.tgs:
-                            if single_recommendations != None:
-                                changed = True
-                                iters = 0
-                                while changed and iters < config["max_recommendation_iteration"]:
-                                    iters += 1
-                                    tg.passTypes(debug = False)
-                                    types = tg.findHotTypes()
-                                    tg.recommendType(types, single_recommendations, formatUserTypes(usertypes), usertypes["module"], args.topn, simmodel = simmodel)
-                                    tg.passTypes(debug = False)
-                                    new_types = tg.findHotTypes()
-                                    changed = detectChange(types, new_types)
-                                    tg.simplifyTypes()
-                            else:
-                                tg.passTypes(debug = False)
-                                tg.simplifyTypes()
-                            str_results[tg.name] = tg.dumptypes()
-                        results[f] = str_results
-                    except Exception as e:
-                        traceback.print_exc()
-                        logger.error("Type inference failed for file {}, reason: {}".format(f, e))
-            with open(outputrepo + "/" + args.repo.replace("/", "_") + "_INFERREDTYPES.json", "w", encoding = "utf-8") as of:
-                of.write(json.dumps(results, sort_keys=True, indent=4, separators=(',', ': ')))
-            logger.info("Saved results to {}".format(outputrepo + "/" + args.repo.replace("/", "_") + "_INFERREDTYPES.json"))
+            files = [f for f in files if os.path.isfile(f)]
+            resultfile = outputrepo + "/" + args.repo.replace("/", "_") + "_INFERREDTYPES.json"
+            fingerprintfile = outputrepo + "/" + args.repo.replace("/", "_") + "_FINGERPRINTS.json"
+            previous = None
+            if args.incremental and os.path.isfile(resultfile) and os.path.isfile(fingerprintfile):
+                previous = {}
+                with open(resultfile, "r", encoding = "utf-8") as rf:
+                    previous["results"] = json.loads(rf.read())
+                with open(fingerprintfile, "r", encoding = "utf-8") as ff:
+                    previous["fingerprints"] = json.loads(ff.read())
+                logger.info("Loaded previous results from {}".format(resultfile))
+            streamfile = resultfile + "l" if args.stream else None
+            results, fingerprints = inferfiles(files, args.repo, recommendations = recommendations, type4py = args.type4py, topn = args.topn, simmodel = simmodel, jobs = args.jobs, previous = previous, streamfile = streamfile)
+            if args.stream:
+                dumpstream(streamfile, resultfile, fingerprintfile = fingerprintfile if args.incremental else None)
+                os.remove(streamfile)
+                logger.info("Saved results to {}".format(resultfile))
+            else:
+                with open(resultfile, "w", encoding = "utf-8") as of:
+                    of.write(json.dumps(results, sort_keys=True, indent=4, separators=(',', ': ')))
+                logger.info("Saved results to {}".format(resultfile))
+                if args.incremental:
+                    with open(fingerprintfile, "w", encoding = "utf-8") as of:
+                        of.write(json.dumps(fingerprints, sort_keys=True, indent=4, separators=(',', ': ')))
+                    logger.info("Saved fingerprints to {}".format(fingerprintfile))
 
 
 def evaluate(args):
     outputrepo = args.output_directory if args.output_directory else "."
     setuplogs(outputrepo)
-    predictions = test_multiplefile(args.groundtruth, args.classified_groundtruth, args.usertype, recfile = args.recommendations if args.recommendations else None, recmodel = args.type4py, topn = args.topn, prefix = args.file_prefix, eval = True)
-    with open(outputrepo + "/" + args.groundtruth.replace("/", "_").replace(".json", "_INFERREDTYPES.json"), "w", encoding = "utf-8") as of:
-        of.write(json.dumps(predictions, sort_keys=True, indent=4, separators=(',', ': ')))
-    logger.info("Saved predictions to {}".format(outputrepo + "/" + args.groundtruth.replace("/", "_").replace(".json", "_INFERREDTYPES.json")))
+    resultname = outputrepo + "/" + args.groundtruth.replace("/", "_").replace(".json", "")
+    shard = None
+    if args.shard:
+        try:
+            shard = [int(i) for i in args.shard.split("/")]
+        except ValueError:
+            shard = None
+        if shard == None or len(shard) != 2 or shard[0] < 1 or shard[0] > shard[1]:
+            logger.error("Shard should be in the form of i/n with 1 <= i <= n, got {}".format(args.shard))
+            raise ValueError("Shard should be in the form of i/n with 1 <= i <= n, got {}".format(args.shard))
+    if args.reduce:
+        #merge the partial results saved by the shards of a previous run, the shard files must be put in the output directory
+        shardfiles = sorted(glob.glob(glob.escape(resultname) + "_SHARD_*.json"))
+        if len(shardfiles) == 0:
+            logger.error("Cannot find any shard results under {}".format(outputrepo))
+            raise ValueError("Cannot find any shard results under {}".format(outputrepo))
+        data = None
+        predictions = {}
+        shards = []
+        for sf in shardfiles:
+            with open(sf, "r", encoding = "utf-8") as f:
+                sharddata = json.loads(f.read())
+            shards.append(sharddata["shard"])
+            if data == None:
+                data = newEvalData(sharddata["categories"])
+            mergeEvalData(data, sharddata["data"])
+            predictions.update(sharddata["predictions"])
+        total = shards[0][1]
+        if sorted(sh[0] for sh in shards) != list(range(1, total + 1)) or any(sh[1] != total for sh in shards):
+            logger.error("Shard results are incomplete or come from different splits: {}".format(shards))
+            raise ValueError("Shard results are incomplete or come from different splits: {}".format(shards))
+        reportEvalData(data)
+    else:
+        predictions, data = test_multiplefile(args.groundtruth, args.classified_groundtruth, args.usertype, recfile = args.recommendations if args.recommendations else None, recmodel = args.type4py, topn = args.topn, prefix = args.file_prefix, eval = True, jobs = args.jobs, shard = shard)
+    if shard != None and not args.reduce:
+        shardfile = resultname + "_SHARD_{}_{}.json".format(shard[0], shard[1])
+        with open(shardfile, "w", encoding = "utf-8") as of:
+            of.write(json.dumps({"shard": shard, "categories": list(data.keys()), "data": data, "predictions": predictions}, sort_keys=True, indent=4, separators=(',', ': ')))
+        logger.info("Saved results of shard {} to {}".format(args.shard, shardfile))
+    else:
+        with open(outputrepo + "/" + args.groundtruth.replace("/", "_").replace(".json", "_INFERREDTYPES.json"), "w", encoding = "utf-8") as of:
+            of.write(json.dumps(predictions, sort_keys=True, indent=4, separators=(',', ': ')))
+        logger.info("Saved predictions to {}".format(outputrepo + "/" + args.groundtruth.replace("/", "_").replace(".json", "_INFERREDTYPES.json")))
 
 
 def preprocess(args):
@@ -261,6 +310,7 @@ def main():
     usertype_parser.add_argument('-c', "--core", default = 8, type=int, help = "Number of cores to use when collecting user-defined types")
     usertype_parser.add_argument("-v", "--validate", default = True, action="store_true", help = "Validate the imported user-defined types by finding their implementations")
     usertype_parser.add_argument('-d', "--output_directory", required = False, type=str, help = "Path to the store the usertypes")
+    usertype_parser.add_argument('-o', "--stream", default = False, action="store_true", help = "Write the user-defined types of each file as soon as they are collected, and resume an interrupted run when collecting a whole dataset")
     usertype_parser.set_defaults(func = findusertype)
 
     tdg_parser = sub_parsers.add_parser('gentdg')
@@ -271,7 +321,7 @@ def main():
     tdg_parser.add_argument('-a', '--alias_analysis', default = False, action="store_true",  help = "Generate alias graphs along with TDG")
     tdg_parser.add_argument('-c', '--call_analysis', default = False, action="store_true",  help = "Generate call graphs along with TDG")
     tdg_parser.add_argument('-d', "--output_directory", required = False, type=str, help = "Path to the generated TDGs")
-    tdg_parser.add_argument('-f', "--output_format", default = "json", choices=["json", "pdf"], type=str, help = "Formats of output TDGs")
+    tdg_parser.add_argument('-f', "--output_format", default = "json", choices=["json", "pdf", "bin"], type=str, help = "Formats of output TDGs")
     tdg_parser.set_defaults(func = gentdg)
 
 
@@ -283,6 +333,9 @@ def main():
     inference_parser.add_argument('-m', "--recommendations", required = False, type=str, help = "Path to the recommendations generated by a DL model")
     inference_parser.add_argument('-t', "--type4py", default = False, action="store_true", help = "Use Type4Py as the recommendation model")
     inference_parser.add_argument('-n', "--topn", default = 1, type = int, help = "Indicate the top n predictions from DL models used by HiTyper")
+    inference_parser.add_argument('-j', "--jobs", default = 1, type = int, help = "Number of processes used to infer types when analyzing a whole project")
+    inference_parser.add_argument('-i', "--incremental", default = False, action="store_true", help = "Only re-infer files that changed since the previous run when analyzing a whole project")
+    inference_parser.add_argument('-o', "--stream", default = False, action="store_true", help = "Write the results of each file as soon as it is inferred, and resume an interrupted run when analyzing a whole project")
     inference_parser.set_defaults(func = infertypes)
 
 
@@ -295,6 +348,9 @@ def main():
     eval_parser.add_argument('-n', "--topn", default = 1, type = int, help = "Indicate the top n predictions from DL models used by HiTyper")
     eval_parser.add_argument('-d', "--output_directory", required = False, type=str, help = "Path to the inferred results")
     eval_parser.add_argument('-p', "--file_prefix", required = False, type=str, help = "Path prefix to the files in ground truth dataset")
+    eval_parser.add_argument('-j', "--jobs", default = 1, type = int, help = "Number of processes used to evaluate the files in ground truth dataset")
+    eval_parser.add_argument('-s', "--shard", required = False, type=str, help = "Only evaluate the i-th of n parts of the ground truth dataset, in the form of i/n")
+    eval_parser.add_argument('-r', "--reduce", default = False, action="store_true", help = "Merge the results of all shards saved in the output directory instead of evaluating")
     eval_parser.set_defaults(func = evaluate)
 
     preprocess_parser = sub_parsers.add_parser('preprocess')
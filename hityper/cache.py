@@ -0,0 +1,74 @@
+import os
+import hashlib
+import hityper
+from hityper import logger
+
+logger.name = __name__
+
+
+'''
+Helpers shared by the persistent caches under the output directory (usertype_cache, tdg_cache, recommendation_cache and summary_cache in config.py).
+'''
+
+#hash of the code of HiTyper, computed once per process
+code_version = None
+
+
+def getCodeVersion():
+    #results computed by HiTyper are cached under keys including the hash of its code, so that an upgraded or patched HiTyper never reuses stale results
+    global code_version
+    if code_version == None:
+        h = hashlib.sha256(hityper.__version__.encode("utf-8"))
+        pkgdir = os.path.dirname(os.path.abspath(hityper.__file__))
+        for name in sorted(os.listdir(pkgdir)):
+            if name.endswith(".py"):
+                h.update(name.encode("utf-8"))
+                with open(os.path.join(pkgdir, name), "rb") as f:
+                    h.update(f.read())
+        code_version = h.hexdigest()
+    return code_version
+
+
+def touchCacheFile(cachefile):
+    #whether cachefile exists, a hit refreshes its modification time so that pruneCache removes the least recently used entries first
+    if cachefile == None or not os.path.isfile(cachefile):
+        return False
+    try:
+        os.utime(cachefile, None)
+    except OSError:
+        pass
+    return True
+
+
+def writeCacheFile(cachefile, data):
+    #data is the content of the entry, or a function writing the entry to the given path
+    #write to a temporary file first so that concurrent processes never read a partial entry, cache directories are only created when something is cached
+    os.makedirs(os.path.dirname(cachefile), exist_ok = True)
+    tmpfile = "{}.{}.tmp".format(cachefile, os.getpid())
+    if callable(data):
+        data(tmpfile)
+    else:
+        with open(tmpfile, "w", encoding = "utf-8") as cf:
+            cf.write(data)
+    os.replace(tmpfile, cachefile)
+
+
+def pruneCache(path, size):
+    #keep at most size entries in the cache directory path, removing the least recently used ones
+    if path == None or size == None or not os.path.isdir(path):
+        return
+    entries = []
+    for name in os.listdir(path):
+        try:
+            entries.append([os.path.getmtime(os.path.join(path, name)), name])
+        except OSError:
+            continue
+    if len(entries) <= size:
+        return
+    entries.sort()
+    for mtime, name in entries[:len(entries) - size]:
+        try:
+            os.remove(os.path.join(path, name))
+        except OSError:
+            pass
+    logger.info("Removed {} least recently used entries from cache {}".format(len(entries) - size, path))
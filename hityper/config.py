@@ -5,6 +5,14 @@ config = {
     #Indicate the web API that HiTyper should call to invoke the DL model
     "type4py": "http://localhost:5001/api/predict?tc=0",
 
+    #Indicate the maximum number of requests sent to the DL model at the same time, the time limit (in seconds) of each request and the number of retries after a failed request
+    "recommendation_connections": 8,
+    "recommendation_timeout": 60,
+    "recommendation_retries": 3,
+
+    #Indicate the directory under the output directory that caches the responses of the DL model for each source file, enter None if you do not want to reuse them across runs
+    "recommendation_cache": "hityper_cache/recommendation",
+
     #Indicate the default DL model used in HiTyper
     "default_model": "type4py",
 
@@ -14,6 +22,33 @@ config = {
     #Indicate the maximum iterations that HiTyper asks the DL model for recommendations
     "max_recommendation_iteration": 20,
 
+    #Indicate the maximum rounds that HiTyper re-solves mutually recursive functions until their return types are stable
+    "max_scc_iteration": 5,
+
+    #Indicate the maximum number of definition paths enumerated for a variable, enter None if you do not want to limit it
+    "max_def_paths": 1000,
+
+    #Indicate the maximum number of distinct type strings whose parsed type objects are cached
+    "str2obj_cache_size": 4096,
+
+    #Indicate the maximum number of distinct types whose rendered names are cached
+    "typename_cache_size": 4096,
+
+    #Indicate the directory under the output directory that caches the classes found in each module when finding user-defined types, enter None to only cache them in memory
+    "usertype_cache": "hityper_cache/usertype",
+
+    #Indicate the directory under the output directory that caches the TDGs generated for each file, enter None if you do not want to reuse TDGs across runs
+    "tdg_cache": "hityper_cache/tdg",
+
+    #Indicate the directory under the output directory that keeps the inferred function and class attribute types of each module, which are used when inferring the modules importing it, enter None to only keep them in memory
+    "summary_cache": "hityper_cache/summary",
+
+    #Indicate the maximum number of entries kept in each cache directory above, the least recently used entries are removed when a command starts, enter None to keep all entries
+    "cache_size": 10000,
+
+    #Indicate the time limit (in seconds) of finding user-defined types for each file in a dataset, enter None if you do not want to limit it
+    "usertype_timeout": 300,
+
     #Indicate the model used in similarity calculation of type correction, enter None if you want to simply using editing distance
     "simmodel": None,
 
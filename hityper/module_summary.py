@@ -0,0 +1,305 @@
+import os
+import ast
+import json
+import hashlib
+from hityper.typeobject import TypeObject
+from hityper.usertype_finder import getRepoIndex
+from hityper.tdg import findSCCs
+from hityper.cache import getCodeVersion, touchCacheFile, writeCacheFile
+from hityper import logger
+
+logger.name = __name__
+
+
+'''
+Summaries of the modules in a repository, used to type calls and attribute reads that refer to other modules.
+
+A summary records the argument and return types of each function of a module and the attribute types of its classes:
+{"functions": {"func@class": {"args": {name: [types]}, "return": [types]}}, "classes": {class: {attribute: [types]}}}
+Types are stored with TypeObject.dump(). Summaries are indexed by the hash of the module source, the summaries of the imported modules used when inferring it and the code of HiTyper,
+so a summary is never used for a modified module or a module whose imported modules are modified.
+'''
+
+#summaries of the modules inferred or loaded by the current process, indexed by getSummaryKey()
+module_summaries = {}
+#directory that persists module_summaries across runs, None means only keeping them in memory
+summary_cache_dir = None
+
+
+def setSummaryCacheDir(path):
+    global summary_cache_dir
+    summary_cache_dir = path
+
+
+def getSummaryKey(source, imported):
+    #imported: module path -> summary of the imported modules used when inferring the module
+    #paths are left out so that the key does not depend on how the repository path is written
+    data = json.dumps([getCodeVersion(), source, sorted(json.dumps(summary, sort_keys = True) for summary in imported.values())])
+    return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def summarizeModule(global_tg):
+    summary = {"functions": {}, "classes": {}}
+    for tg in global_tg.tgs:
+        tg.storeAttributeTypes()
+        args = {}
+        returntypes = []
+        for r in tg.returntypes():
+            if r["category"] == "arg":
+                args[r["name"]] = [t.dump() for t in r["type"]]
+            elif r["category"] == "return":
+                returntypes += [t.dump() for t in r["type"]]
+        summary["functions"][tg.name] = {"args": args, "return": returntypes}
+    for c in global_tg.classtypes:
+        summary["classes"][c] = {}
+        for attr in global_tg.classtypes[c]:
+            if attr != "@id@" and len(global_tg.classtypes[c][attr]) > 0:
+                summary["classes"][c][attr] = [t.dump() for t in global_tg.classtypes[c][attr]]
+    return summary
+
+
+def saveModuleSummary(source, summary, imported):
+    key = getSummaryKey(source, imported)
+    module_summaries[key] = json.dumps(summary)
+    if summary_cache_dir != None:
+        writeCacheFile(os.path.join(summary_cache_dir, key + ".json"), module_summaries[key])
+
+
+def loadModuleSummary(key):
+    #the summary stored under key, None if no such module is inferred yet
+    if key not in module_summaries:
+        cachefile = os.path.join(summary_cache_dir, key + ".json") if summary_cache_dir != None else None
+        if not touchCacheFile(cachefile):
+            return None
+        with open(cachefile, "r", encoding = "utf-8") as cf:
+            module_summaries[key] = cf.read()
+    return json.loads(module_summaries[key])
+
+
+def findModule(filename, repo, module, level):
+    #path of the python file of module imported in filename, None if it is not in the repository
+    if level > 0:
+        base = os.path.dirname(filename)
+        for i in range(1, level):
+            base = os.path.dirname(base)
+        candidates = [os.path.join(base, *module.split(".")) if module != None else base]
+    elif module != None:
+        candidates = [os.path.join(repo, *module.split("."))]
+    else:
+        return None
+    for c in candidates:
+        if os.path.isfile(c + ".py"):
+            return c + ".py"
+        elif os.path.isfile(os.path.join(c, "__init__.py")):
+            return os.path.join(c, "__init__.py")
+    if level == 0:
+        repoindex = getRepoIndex(repo)
+        files = repoindex.find(module.replace(".", "/") + ".py")
+        if len(files) == 0:
+            files = repoindex.find(module.replace(".", "/") + "/__init__.py")
+        if len(files) > 0:
+            return files[0]
+    return None
+
+
+def getImports(filename, repo, root):
+    #local name -> [path of the module, imported name], the imported name is None if the local name refers to the module itself
+    names = {}
+    if repo == None:
+        return names
+    for node in ast.walk(root):
+        if isinstance(node, ast.Import):
+            for i in node.names:
+                if i.asname == None and "." in i.name:
+                    continue
+                path = findModule(filename, repo, i.name, 0)
+                if path != None:
+                    names[i.asname if i.asname != None else i.name] = [path, None]
+        elif isinstance(node, ast.ImportFrom):
+            for i in node.names:
+                if i.name == "*":
+                    continue
+                submodule = node.module + "." + i.name if node.module != None else i.name
+                path = findModule(filename, repo, submodule, node.level)
+                if path != None:
+                    names[i.asname if i.asname != None else i.name] = [path, None]
+                    continue
+                path = findModule(filename, repo, node.module, node.level)
+                if path != None:
+                    names[i.asname if i.asname != None else i.name] = [path, i.name]
+    return names
+
+
+def getImportedModules(filename, repo, root):
+    modules = []
+    for name, imported in getImports(filename, repo, root).items():
+        if imported[0] != filename and imported[0] not in modules:
+            modules.append(imported[0])
+    return modules
+
+
+def orderModules(files, repo):
+    #group files into levels, files in a level only import files in previous levels or files of the same import cycle
+    imports = {}
+    fileset = set(files)
+    for f in files:
+        try:
+            root = ast.parse(open(f, "r", encoding = "utf-8").read())
+            imports[f] = [m for m in getImportedModules(f, repo, root) if m in fileset]
+        except Exception as e:
+            logger.warning("Cannot find the modules imported by {}, reason: {}".format(f, e))
+            imports[f] = []
+    #import cycles are emitted after the modules they import
+    levels = []
+    levelof = {}
+    for scc in findSCCs(files, lambda f: imports[f]):
+        level = 0
+        for m in scc:
+            for d in imports[m]:
+                if d in levelof and d not in scc:
+                    level = max(level, levelof[d] + 1)
+        for m in scc:
+            levelof[m] = level
+        while len(levels) <= level:
+            levels.append([])
+        levels[level] += scc
+    #keep the given order of files inside each level
+    order = {}
+    for i, f in enumerate(files):
+        order[f] = i
+    for level in levels:
+        level.sort(key = lambda f: order[f])
+    return levels, imports
+
+
+class ImportedSummaries(object):
+    #summaries of the repository modules imported by a file, looked up by the names used in the file
+    def __init__(self, names, summaries):
+        self.names = names
+        self.summaries = summaries
+        #class name used in the file -> [module path, class name in that module]
+        self.classes = {}
+        for name, imported in names.items():
+            summary = summaries.get(imported[0])
+            if summary == None:
+                continue
+            if imported[1] != None:
+                if self.isClass(summary, imported[1]):
+                    self.classes[name] = [imported[0], imported[1]]
+            else:
+                for c in self.getClasses(summary):
+                    if c not in self.classes:
+                        self.classes[c] = [imported[0], c]
+
+    @staticmethod
+    def isClass(summary, name):
+        if name in summary["classes"]:
+            return True
+        for f in summary["functions"]:
+            if f.endswith("@" + name):
+                return True
+        return False
+
+    @staticmethod
+    def getClasses(summary):
+        classes = list(summary["classes"].keys())
+        for f in summary["functions"]:
+            c = f.split("@")[-1]
+            if c != "global" and c not in classes:
+                classes.append(c)
+        return classes
+
+    @staticmethod
+    def loadTypes(types):
+        return [TypeObject.load(t) for t in types]
+
+    def getReturnType(self, func, attr, targettypes):
+        #return types of a call of func (on attr), None if no summary covers the call
+        returntypes = []
+        if attr == None:
+            if func not in self.names or self.names[func][1] == None or self.names[func][0] not in self.summaries:
+                return None
+            function = self.summaries[self.names[func][0]]["functions"].get(self.names[func][1] + "@global")
+            if function == None:
+                return None
+            returntypes += function["return"]
+        elif attr in self.names and self.names[attr][1] == None:
+            if self.names[attr][0] not in self.summaries:
+                return None
+            function = self.summaries[self.names[attr][0]]["functions"].get(func + "@global")
+            if function == None:
+                return None
+            returntypes += function["return"]
+        else:
+            #methods are only resolved when all possible types of the target are imported classes
+            if len(targettypes) == 0:
+                return None
+            for t in targettypes:
+                if t.category != 2 or t.type not in self.classes:
+                    return None
+                path, c = self.classes[t.type]
+                function = self.summaries[path]["functions"].get(func + "@" + c)
+                if function == None:
+                    return None
+                returntypes += function["return"]
+        if len(returntypes) == 0:
+            return None
+        return self.loadTypes(returntypes)
+
+    def getAttributeType(self, attr, targettypes):
+        types = []
+        for t in targettypes:
+            if t.category == 2 and t.type in self.classes:
+                path, c = self.classes[t.type]
+                types += self.loadTypes(self.summaries[path]["classes"].get(c, {}).get(attr, []))
+        return types
+
+
+def findSummaries(filename, repo, root):
+    #stored summaries of the modules imported by filename, the key of a summary depends on the summaries of the modules it imports,
+    #so all modules reachable from filename are resolved, modules only use the summaries of the modules outside their import cycle
+    sources = {}
+    imports = {filename: getImportedModules(filename, repo, root)}
+    queue = list(imports[filename])
+    while len(queue) > 0:
+        m = queue.pop()
+        if m in imports:
+            continue
+        try:
+            sources[m] = open(m, "r", encoding = "utf-8").read()
+            imports[m] = getImportedModules(m, repo, ast.parse(sources[m]))
+        except Exception as e:
+            logger.warning("Cannot read module {} to load its summary, reason: {}".format(m, e))
+            sources.pop(m, None)
+            imports[m] = []
+        queue += imports[m]
+    summaries = {}
+    for scc in findSCCs([filename], lambda m: imports[m]):
+        for m in scc:
+            if m not in sources:
+                continue
+            imported = {}
+            for d in imports[m]:
+                if d in summaries and d not in scc:
+                    imported[d] = summaries[d]
+            summary = loadModuleSummary(getSummaryKey(sources[m], imported))
+            if summary != None:
+                summaries[m] = summary
+        if filename in scc:
+            return {d: summaries[d] for d in imports[filename] if d in summaries and d not in scc}
+    return {}
+
+
+def loadImportedSummaries(filename, repo, root, summaries = None):
+    #summaries: module path -> summary of the imported modules, looked up in the summary store if not given
+    names = getImports(filename, repo, root)
+    if summaries == None:
+        summaries = findSummaries(filename, repo, root)
+    found = {}
+    for name, imported in names.items():
+        path = imported[0]
+        if path in found or path == filename:
+            continue
+        if path in summaries:
+            found[path] = summaries[path]
+    return ImportedSummaries(names, found)
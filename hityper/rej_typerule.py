@@ -7,89 +7,107 @@ logger.name = __name__
 
 
 class Rej_TypingRule(object):
+    #handlers of each operation, resolved once for each operation and whether it has more than one operand
+    handlers = {}
+
     def __init__(self):
         pass
 
-    def check_failed(self, ori, rej):
-        if len(ori) == len(rej):
-            logger.warning("Rejection Typing rule faild, all types are rejected.")
-
+    @staticmethod
+    def getHandler(op, binary):
+        if (op, binary) not in Rej_TypingRule.handlers:
+            Rej_TypingRule.handlers[(op, binary)] = Rej_TypingRule.resolveHandler(op, binary)
+        return Rej_TypingRule.handlers[(op, binary)]
 
-    def act(self, outs, operands , op, func, attr, usertypes, iterable=False):
-        #if not about iterable
-        if not iterable:
-            if len(operands) > 0:
-                left = operands[0]
-            else:
-                left = None
-            right = None
-            if(len(operands)>1):
-                right = operands[1]
-            else:
-                right = None
-            if(left != None and (not isinstance(left, hityper.tdg.GraphBaseNode)) or (right != None and not isinstance(right,  hityper.tdg.GraphBaseNode))):
-                raise ValueError("Operands must be a graph node")
+    #all handlers are called with (rule, outs, operands, left, right, op, func, attr, usertypes)
+    @staticmethod
+    def resolveHandler(op, binary):
         if (op in ["and", "or"]):
-            return self.norej_add(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs,operands)
         elif (op == "not"):
-            return self.norej_add(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs,operands)
         elif (op in ["<", "<=", ">", ">="]):
-            return self.norej_add(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs,operands)
         elif (op in ["==", "!=", "is", "isnot"]):
-            return self.norej_add(outs, operands)
-        elif (op == "+" and right != None):
-            return self.binop_add(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
+        elif (op == "+" and binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_add(outs,operands)
         elif (op == "*"):
-            return self.binop_mul(outs,left, right)
-        elif (op in ["-", "/", "//", "%", "**", "pow"] and right != None):
-            return self.binop_num_op(outs, left, right, op)
-        elif (op in ["+", "-", "abs"] and right == None):
-            return self.NumRemainSame(outs,left, right)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_mul(outs,left, right)
+        elif (op in ["-", "/", "//", "%", "**", "pow"] and binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_num_op(outs, left, right, op)
+        elif (op in ["+", "-", "abs"] and not binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.NumRemainSame(outs,left, right)
         elif (op in ["|", "^", "&", "<<", ">>"]):
-            return self.binop_int_op(outs, left, right)
-        elif (op == "~" and right == None):
-            return self.unop_int_op(outs, left, right)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_int_op(outs, left, right)
+        elif (op == "~" and not binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.unop_int_op(outs, left, right)
         elif (op in ["in", "not in"] ):
-            return self.norej_add(outs, operands)
-        elif (op == "forin" and right == None):
-            return self.unop_forin(outs, left, right)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
+        elif (op == "forin" and not binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.unop_forin(outs, left, right)
         elif (op == "append"):
-            return self.binop_append(outs,left, right)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_append(outs,left, right)
         elif (op == "Subscript_Write"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif (op == "Subscript_Read"):
-            return self.binop_subscript(outs,operands, func, attr, usertypes)
-        elif (op == "=" and right == None):
-            return self.unop_assign(outs,left, right)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.binop_subscript(outs,operands, func, attr, usertypes)
+        elif (op == "=" and not binary):
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.unop_assign(outs,left, right)
         elif (op == "call"):
-            return self.rej_call(outs, operands, func, attr, usertypes)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.rej_call(outs, operands, func, attr, usertypes)
         elif (op == "List_Read"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif( op == "List_Write"):
-            return self.List_Write(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.List_Write(outs,operands)
         elif(op == "Tuple_Read"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op == "Tuple_Write"):
-            return  self.Add_tofirst(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.Add_tofirst(outs,operands)
         elif(op == "Set_Read"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op =="Dict_Read"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op == "JoinedStr"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op=="."):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op=="ListComp"):
-            return  self.Add_tofirst(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.Add_tofirst(outs, operands)
         elif(op=="SetComp"):
-            return self.Add_tofirst(outs,operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.Add_tofirst(outs,operands)
         elif(op=="DictComp"):
-            return self.norej_add(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.norej_add(outs, operands)
         elif(op=="GeneratorExp"):
-            return self.Add_tofirst(outs, operands)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.Add_tofirst(outs, operands)
         else: #for unknown_op
-            return self.unknown_op(outs,operands, op)
-            #raise TypeError("Unknown Operation: " + op)
+            return lambda rule, outs, operands, left, right, op, func, attr, usertypes: rule.unknown_op(outs,operands, op)
+
+
+    def check_failed(self, ori, rej):
+        if len(ori) == len(rej):
+            logger.warning("Rejection Typing rule faild, all types are rejected.")
+
+
+    def act(self, outs, operands , op, func, attr, usertypes, iterable=False, handler = None):
+        left = None
+        right = None
+        #if not about iterable
+        if not iterable:
+            if len(operands) > 0:
+                left = operands[0]
+            else:
+                left = None
+            right = None
+            if(len(operands)>1):
+                right = operands[1]
+            else:
+                right = None
+            if(left != None and (not isinstance(left, hityper.tdg.GraphBaseNode)) or (right != None and not isinstance(right,  hityper.tdg.GraphBaseNode))):
+                raise ValueError("Operands must be a graph node")
+        if handler == None:
+            handler = Rej_TypingRule.getHandler(op, len(operands) > 1)
+        return handler(self, outs, operands, left, right, op, func, attr, usertypes)
 
 
 
@@ -1,16 +1,21 @@
 from graphviz import Digraph
-from hityper import logger
+from hityper import logger, isLogged
 from hityper.typeobject import TypeObject
 from hityper.typerule import TypingRule
 from hityper.rej_typerule import Rej_TypingRule
 from hityper.config import config
-from copy import copy, deepcopy
+from copy import copy
+from collections import deque
+import logging
 import Levenshtein
 
 
 
 logger.name = __name__
 
+#typing rules are stateless, so all nodes share the same rule objects
+typingrule = TypingRule()
+rejtypingrule = Rej_TypingRule()
 
 
 def checkAttribute(dictobj, attrs):
@@ -20,6 +25,9 @@ def checkAttribute(dictobj, attrs):
     return True
 
 class GraphBaseNode(object):
+    #nodes are created in large numbers, so they have fixed attributes instead of a per-instance __dict__
+    __slots__ = ("nodetype", "ins", "outs", "name", "lineno", "columnno", "columnend", "tg", "rejtypes", "nodeindex", "tag", "visitlabel")
+
     def __init__(self, ins, outs, name):
         #Node Type: Symbol, TypeGen, Type, Base
         self.nodetype = "Base"
@@ -31,7 +39,8 @@ class GraphBaseNode(object):
         self.columnend = 0
         self.tg = None
         self.rejtypes = []
-        self.nodeid = "Not Assigned"
+        #position of the node in its graph, nodeid is derived from it when needed
+        self.nodeindex = -1
         self.tag = 0
 
         #visitlabel: 0 - this node is never visited
@@ -39,6 +48,19 @@ class GraphBaseNode(object):
         #2 - this node is finalized and can pass message to neighbors
         self.visitlabel = 0
 
+    @property
+    def nodeid(self):
+        if self.tg == None or self.nodeindex < 0:
+            return "Not Assigned"
+        return self.tg.name + "@" + str(self.nodeindex)
+
+    @nodeid.setter
+    def nodeid(self, nodeid):
+        if "@" in nodeid:
+            self.nodeindex = int(nodeid.split("@")[-1])
+        else:
+            self.nodeindex = -1
+
     def setNodePos(self, lineno, columnno, columnend):
         self.lineno = lineno
         self.columnno = columnno
@@ -128,6 +150,8 @@ class GraphBaseNode(object):
     
 
 class SymbolNode(GraphBaseNode):
+    __slots__ = ("extra", "scope", "symbol", "classname", "order", "types", "ctx", "change")
+
     def __init__(self, ins, outs, symbol, order, classname = None, scope = "local", ctx = "Read", extra = False):
         super(SymbolNode, self).__init__(ins, outs, symbol)
         self.nodetype = "Symbol"
@@ -253,6 +277,8 @@ class SymbolNode(GraphBaseNode):
 
 
 class TypeGenNode(GraphBaseNode):
+    __slots__ = ("op", "func", "attr", "types", "splitindex", "rejinputtypes", "typinghandler", "rejtypinghandler")
+
     def __init__(self, operation, ins, outs, func = None, attr = None, splitindex = 0):
         super(TypeGenNode, self).__init__(ins, outs, operation)
         self.nodetype = "TypeGen"
@@ -264,6 +290,9 @@ class TypeGenNode(GraphBaseNode):
         self.types = []
         self.splitindex = splitindex
         self.rejinputtypes = []
+        #[whether the node has more than one input, handler], resolved at the first time the node is evaluated
+        self.typinghandler = None
+        self.rejtypinghandler = None
 
     def setFunc(self, func):
         self.func = func
@@ -294,8 +323,10 @@ class TypeGenNode(GraphBaseNode):
                     raise ValueError("TypeGenNode with Subscript_Write should not have more than 4 input nodes")
 
         norej = True
-        typerule = TypingRule()
-        outputs = typerule.act(self.ins, self.op, self.func, self.attr, usertype, iterable=iterable, curnode = self)
+        binary = len(self.ins) > 1
+        if self.typinghandler == None or self.typinghandler[0] != binary:
+            self.typinghandler = [binary, TypingRule.getHandler(self.op, binary)]
+        outputs = typingrule.act(self.ins, self.op, self.func, self.attr, usertype, iterable=iterable, curnode = self, handler = self.typinghandler[1])
         if self.op not in ["List_Write", "Tuple_Write"]:
             if len(outputs) == 2:
                 self.rejinputtypes = outputs[0]
@@ -317,7 +348,8 @@ class TypeGenNode(GraphBaseNode):
                         if i < len(self.ins):
                             for t in n:
                                 if t not in self.ins[i].rejtypes and t.category != 2 and not isinstance(self.ins[i], TypeNode):
-                                    logger.info("Reject {} for node {} in op {}.".format(TypeObject.resolveTypeName(t), self.ins[i].name, self.op if self.op != "call" else self.func))
+                                    if isLogged(logging.INFO):
+                                        logger.info("Reject {} for node {} in op {}.".format(TypeObject.resolveTypeName(t), self.ins[i].name, self.op if self.op != "call" else self.func))
                                     self.ins[i].rejtypes.append(t)
             else:
                 raise ValueError("outputs should have at least 3 elements.")
@@ -338,13 +370,16 @@ class TypeGenNode(GraphBaseNode):
                         if i < len(self.ins):
                             for t in n:
                                 if t not in self.ins[i].rejtypest not in self.ins[i].rejtypes and t.category != 2 and not isinstance(self.ins[i], TypeNode):
-                                    logger.info(f"Reject {TypeObject.resolveTypeName(t)} for node {self.ins[i].name} in op {self.op}.")
+                                    if isLogged(logging.INFO):
+                                        logger.info(f"Reject {TypeObject.resolveTypeName(t)} for node {self.ins[i].name} in op {self.op}.")
                                     self.ins[i].rejtypes.append(t)
         return norej
 
     def performRejTypingRule(self, usertype = None, iterable = False):
-        rejtyperule = Rej_TypingRule()
-        rejtypes = rejtyperule.act(self, self.ins, self.op, self.func, self.attr, usertype, iterable = iterable)
+        binary = len(self.ins) > 1
+        if self.rejtypinghandler == None or self.rejtypinghandler[0] != binary:
+            self.rejtypinghandler = [binary, Rej_TypingRule.getHandler(self.op, binary)]
+        rejtypes = rejtypingrule.act(self, self.ins, self.op, self.func, self.attr, usertype, iterable = iterable, handler = self.rejtypinghandler[1])
         if len(rejtypes) != len(self.ins):
             if self.op == "call":
                 logger.error("[Static Inference]Incorrect number of rejected types in {} {} at line {}. Expected number of rejected types are {} but get {}".format(self.op, self.func, self.lineno, len(self.ins), len(rejtypes)))
@@ -413,6 +448,8 @@ class TypeGenNode(GraphBaseNode):
 
 
 class TypeNode(GraphBaseNode):
+    __slots__ = ("type", "types")
+
     def __init__(self, outs, t):
         if(not isinstance(t, TypeObject)):
             raise ValueError("t must be a TypeObject object.")
@@ -466,6 +503,8 @@ class TypeNode(GraphBaseNode):
 
 
 class BranchNode(GraphBaseNode):
+    __slots__ = ("branchvar", "outtypes", "types")
+
     def __init__(self, ins, outs, var):
         super(BranchNode, self).__init__(ins, outs, "branch")
         self.nodetype = "Branch"
@@ -476,6 +515,15 @@ class BranchNode(GraphBaseNode):
     
     def addTypes(self, types):
         self.outtypes = types
+
+    def getSlot(self, node):
+        #branch nodes have exactly two output slots, check them directly instead of searching outs
+        if len(self.outs) == 2:
+            if self.outs[0] is node:
+                return 0
+            elif self.outs[1] is node:
+                return 1
+        return self.outs.index(node)
     
     def cleartypes(self):
         self.outtypes = []
@@ -575,6 +623,8 @@ class BranchNode(GraphBaseNode):
 
 
 class MergeNode(GraphBaseNode):
+    __slots__ = ("mergevar", "types")
+
     def __init__(self, ins, outs, var):
         super(MergeNode, self).__init__(ins, outs, "merge")
         self.nodetype = "Merge"
@@ -631,6 +681,294 @@ class MergeNode(GraphBaseNode):
         
 
 
+class WorkList(object):
+    #FIFO worklist used when passing types through TDGs, nodes are visited in the same order as a plain list
+    #but dequeue and membership test are O(1)
+    def __init__(self, nodes = []):
+        self.queue = deque()
+        self.members = {}
+        for n in nodes:
+            self.append(n)
+
+    def append(self, node):
+        self.queue.append(node)
+        self.members[node] = self.members.get(node, 0) + 1
+
+    def popleft(self):
+        node = self.queue.popleft()
+        self.members[node] -= 1
+        if self.members[node] == 0:
+            del self.members[node]
+        return node
+
+    def __contains__(self, node):
+        return node in self.members
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+
+
+#record the visit label and the type set of each node after a forward pass, used by incremental passes
+def snapshotNodes(nodes):
+    snapshot = {}
+    for n in nodes:
+        if isinstance(n, BranchNode):
+            snapshot[n] = [n.visitlabel, [copy(n.types[0]), copy(n.types[1])]]
+        else:
+            snapshot[n] = [n.visitlabel, copy(n.types)]
+    return snapshot
+
+def isSameTypeList(l, r):
+    if len(l) != len(r):
+        return False
+    for i in range(0, len(l)):
+        if l[i] is not r[i]:
+            return False
+    return True
+
+#nodes whose type sets are modified after the last forward pass, e.g., by rejections or recommendations
+def getChangedNodes(nodes, snapshot):
+    changednodes = []
+    for n in nodes:
+        if n not in snapshot:
+            changednodes.append(n)
+        elif isinstance(n, BranchNode):
+            if not isSameTypeList(n.types[0], snapshot[n][1][0]) or not isSameTypeList(n.types[1], snapshot[n][1][1]):
+                changednodes.append(n)
+        elif not isSameTypeList(n.types, snapshot[n][1]):
+            changednodes.append(n)
+    return changednodes
+
+#all nodes reachable from the changed nodes, return None if the graph is modified after the last forward pass
+def getAffectedNodes(changednodes, snapshot):
+    affected = set()
+    queue = []
+    for n in changednodes:
+        if n not in snapshot:
+            return None
+        affected.add(n)
+        queue.append(n)
+    while(len(queue) != 0):
+        n = queue.pop()
+        for o in n.outs:
+            if o == "PlaceHolder" or o in affected:
+                continue
+            elif o not in snapshot:
+                return None
+            affected.add(o)
+            queue.append(o)
+    return affected
+
+def getNodeOrder(nodes):
+    nodeorder = {}
+    for i, n in enumerate(nodes):
+        if n in nodeorder:
+            return None
+        nodeorder[n] = i
+    return nodeorder
+
+def findSCCs(nodes, successors):
+    #Tarjan's algorithm, each strongly connected component is emitted after the components it reaches
+    #successors(n) gives the nodes reached from n, which are visited even if they are not in nodes
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    sccs = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        onstack.add(root)
+        work = [(root, iter(successors(root)))]
+        while len(work) > 0:
+            n, it = work[-1]
+            pushed = False
+            for m in it:
+                if m not in index:
+                    index[m] = lowlink[m] = len(index)
+                    stack.append(m)
+                    onstack.add(m)
+                    work.append((m, iter(successors(m))))
+                    pushed = True
+                    break
+                elif m in onstack:
+                    lowlink[n] = min(lowlink[n], index[m])
+            if pushed:
+                continue
+            work.pop()
+            if len(work) > 0:
+                lowlink[work[-1][0]] = min(lowlink[work[-1][0]], lowlink[n])
+            if lowlink[n] == index[n]:
+                scc = []
+                while True:
+                    m = stack.pop()
+                    onstack.discard(m)
+                    scc.append(m)
+                    if m == n:
+                        break
+                sccs.append(scc)
+    return sccs
+
+def getPosKey(node):
+    #key of the positional index kept by TypeGraph and GlobalTypeGraph, only Symbol and TypeGen nodes are indexed
+    if isinstance(node, SymbolNode):
+        return ("Symbol", node.symbol, node.lineno)
+    elif isinstance(node, TypeGenNode):
+        return ("TypeGen", node.op, node.lineno)
+    else:
+        return None
+
+
+def isDefNode(node, localonly):
+    return len(node.ins) == 0 or (localonly and isinstance(node, TypeGenNode) and node.op == "call")
+
+def isDefEdge(innode, localonly):
+    return not (localonly and isinstance(innode, SymbolNode) and innode.scope != "local")
+
+def getDefNodes(end, localonly):
+    #nodes before end that lead to at least one definition, def paths never pass other nodes
+    region = set([end])
+    stack = [end]
+    users = {}
+    while len(stack) > 0:
+        node = stack.pop()
+        if isDefNode(node, localonly):
+            continue
+        for innode in node.ins:
+            if not isDefEdge(innode, localonly):
+                continue
+            if innode not in users:
+                users[innode] = []
+            users[innode].append(node)
+            if innode not in region:
+                region.add(innode)
+                stack.append(innode)
+    defnodes = set([n for n in region if isDefNode(n, localonly)])
+    queue = deque(defnodes)
+    while len(queue) > 0:
+        node = queue.popleft()
+        if node in users:
+            for n in users[node]:
+                if n not in defnodes:
+                    defnodes.add(n)
+                    queue.append(n)
+    return defnodes
+
+def iterDefPath(end, iteration, prev_nodes, defnodes, localonly):
+    #prev_nodes is shared by the whole search and only holds the nodes on the current path, each path list is only built once and extended towards the queried node
+    if isDefNode(end, localonly):
+        yield [end]
+    elif iteration <= config["max_tdg_iteration"]:
+        for o in end.ins:
+            if o in prev_nodes or o not in defnodes or not isDefEdge(o, localonly):
+                continue
+            prev_nodes.append(end)
+            for p in iterDefPath(o, iteration + 1, prev_nodes, defnodes, localonly):
+                p.append(end)
+                yield p
+            prev_nodes.pop()
+
+def getLimitedDefPaths(paths, node):
+    res = []
+    for p in paths:
+        if config["max_def_paths"] != None and len(res) >= config["max_def_paths"]:
+            logger.warning("Too many definition paths for variable {}, only the first {} paths are used.".format(node.name, config["max_def_paths"]))
+            break
+        res.append(p)
+    return res
+
+def getEmptyIns(node, emptyins):
+    #inputs without types that a dominance check follows from node, None if the check fails at this node
+    #the check fails at nodes without such inputs and at nodes with an untyped method call as input
+    if node not in emptyins:
+        ins = []
+        for innode in node.ins:
+            if len(innode.types) == 0:
+                if isinstance(innode, TypeGenNode) and innode.op == "call" and innode.func != None and  "_@_" in innode.func:
+                    ins = None
+                    break
+                ins.append(innode)
+        if ins != None and len(ins) == 0:
+            ins = None
+        emptyins[node] = ins
+    return emptyins[node]
+
+def getDominateScope(targets, emptyins):
+    #nodes that can reach targets through inputs without types, no other node can be dominated by targets
+    scope = set(targets)
+    queue = deque(targets)
+    while len(queue) > 0:
+        node = queue.popleft()
+        for o in node.outs:
+            if o == "PlaceHolder" or o in scope:
+                continue
+            ins = getEmptyIns(o, emptyins)
+            if ins != None and node in ins:
+                scope.add(o)
+                queue.append(o)
+    return scope
+
+def getDominateDepths(targets, starts, emptyins, scope):
+    #a node is dominated by targets if it is one of them, or if it has inputs without types and all of them are dominated by targets
+    #depth of a node is the number of steps needed to reach targets through inputs without types, None if targets can never be reached
+    #targets dominate a node within 100 levels iff its depth is at most 100
+    depths = {}
+    for start in starts:
+        if start in depths:
+            continue
+        if start not in scope:
+            depths[start] = None
+            continue
+        #[node, inputs without types, index of the next input to visit, max depth of visited inputs]
+        stack = [[start, None, 0, 0]]
+        onstack = set([start])
+        while len(stack) > 0:
+            frame = stack[-1]
+            node = frame[0]
+            finished = False
+            if frame[1] == None:
+                if node in targets:
+                    depth = 0
+                    finished = True
+                elif getEmptyIns(node, emptyins) == None:
+                    depth = None
+                    finished = True
+                else:
+                    frame[1] = getEmptyIns(node, emptyins)
+            elif frame[2] == len(frame[1]):
+                depth = frame[3] + 1
+                finished = True
+            else:
+                innode = frame[1][frame[2]]
+                if innode in depths:
+                    if depths[innode] == None:
+                        depth = None
+                        finished = True
+                    else:
+                        frame[3] = max(frame[3], depths[innode])
+                        frame[2] += 1
+                #a loop without types never reaches targets
+                elif innode in onstack or innode not in scope:
+                    depth = None
+                    finished = True
+                else:
+                    stack.append([innode, None, 0, 0])
+                    onstack.add(innode)
+            if finished:
+                depths[node] = depth
+                stack.pop()
+                onstack.remove(node)
+    return depths
+
+
+
+
 class TypeGraph(object):
     def __init__(self, name, usertypes, filename, classname, globaltg):
         self.name = name
@@ -658,20 +996,36 @@ class TypeGraph(object):
         self.startlineno = 0
 
         self.nodeindex = 0
+        #(nodetype, symbol or op, lineno) -> nodes at that line, in the order they are added
+        self.posindex = {}
+
+        #state of the last forward pass, used in incremental mode
+        self.lastpass = None
+        #[nodes without types, arguments with only None type, hot type slots] of the last findHotTypes
+        self.lasthotslots = None
 
 
     def getNode(self, lineno, name, nodetype = "Symbol"):
-        if nodetype == "Symbol":
-            for n in self.symbolnodes:
-                if n.lineno == lineno and n.name == name:
-                    return n
-        elif nodetype == "TypeGen":
-            for n in self.typegennodes:
-                if n.lineno == lineno and n.op == name:
-                    return n
+        if (nodetype, name, lineno) in self.posindex:
+            return self.posindex[(nodetype, name, lineno)][0]
         else:
             return None
 
+    def indexNode(self, node):
+        key = getPosKey(node)
+        if key == None:
+            return
+        if key not in self.posindex:
+            self.posindex[key] = [node]
+        else:
+            self.posindex[key].append(node)
+
+    def searchNode(self, nodetype, name, pos):
+        for n in self.posindex.get((nodetype, name, pos[0]), []):
+            if n.columnno == pos[1] and n.columnend == pos[2]:
+                return n
+        return None
+
 
     def addNode(self, node):
         if self.inloop:
@@ -698,7 +1052,7 @@ class TypeGraph(object):
         self.nodes.append(node)
         if not isinstance(node.tg, GlobalTypeGraph):
             node.tg = self
-            node.nodeid = self.name + "@" + str(self.nodeindex)
+            node.nodeindex = self.nodeindex
             self.nodeindex += 1
         if (isinstance(node, SymbolNode)):
             if node.ctx == "Arg":
@@ -709,11 +1063,13 @@ class TypeGraph(object):
                 self.symbolnodes[node.symbol] = [node]
             else:
                 self.symbolnodes[node.symbol].append(node)
+            self.indexNode(node)
         elif (isinstance(node, TypeGenNode)):
             if (node.op not in self.typegennodes):
                 self.typegennodes[node.op] = [node]
             else:
                 self.typegennodes[node.op].append(node)
+            self.indexNode(node)
         elif (isinstance(node, TypeNode)):
             if (node.type not in self.typenodes):
                 self.typenodes[node.type] = node
@@ -745,8 +1101,10 @@ class TypeGraph(object):
 
     def getNoInputNodes(self):
         noinputnodes = []
+        visited = set()
         for n in self.nodes:
-            if len(n.ins) == 0 and n not in noinputnodes:
+            if len(n.ins) == 0 and n not in visited:
+                visited.add(n)
                 noinputnodes.append(n)
         return noinputnodes
 
@@ -754,61 +1112,17 @@ class TypeGraph(object):
         for n in self.nodes:
             n.visitlabel = 0
 
-    def getNodewithRejTypes(self):
+    def getNodewithRejTypes(self, candidates = None):
+        if candidates == None:
+            candidates = self.nodes
         nodes = []
-        for n in self.nodes:
+        for n in candidates:
             if not isinstance(n, BranchNode) and len(n.rejtypes) != 0:
                 nodes.append(n)
             elif isinstance(n, BranchNode) and (len(n.rejtypes[0]) != 0 or len(n.rejtypes[1]) != 0):
                 nodes.append(n)
         return nodes
     
-    def isDominate(self, a, b, iternum):
-        if iternum > 100:
-            return False
-        if len(a.outs) == 0:
-            return False
-        elif a == b:
-            return True
-        else:
-            bemptyins = []
-            for innode in b.ins:
-                if len(innode.types) == 0:
-                    if isinstance(innode, TypeGenNode) and innode.op == "call" and innode.func != None and  "_@_" in innode.func:
-                        return False
-                    bemptyins.append(innode)
-            if len(bemptyins) == 0:
-                return False
-            for node in bemptyins:
-                if not self.isDominate(a, node, iternum+1):
-                    return False
-
-            return True
-
-    def isSetDominate(self, seta, b, iternum):
-        outs = []
-        if iternum > 100:
-            return False
-        for n in seta:
-            outs += n.outs
-        if len(outs) == 0:
-            return False
-        elif b in seta:
-            return True
-        else:
-            bemptyins = []
-            for innode in b.ins:
-                if len(innode.types) == 0:
-                    if isinstance(innode, TypeGenNode) and innode.op == "call" and innode.func != None and  "_@_" in innode.func:
-                        return False
-                    bemptyins.append(innode)
-            if len(bemptyins) == 0:
-                return False
-            for node in bemptyins:
-                if not self.isSetDominate(seta, node, iternum +1):
-                    return False
-            return True
-
     def getReturnType(self):
         returntype = []
         if len(self.returnvaluenodes) == 0:
@@ -819,45 +1133,13 @@ class TypeGraph(object):
 
 
     def getDefPath(self, end, iteration, prev_nodes):
-        if len(end.ins) == 0:
-            return [[end]]
-        elif isinstance(end, TypeGenNode) and end.op == "call":
-            return [[end]]
-        elif iteration > config["max_tdg_iteration"]:
-            return []
-        else:
-            subpaths = []
-            for o in end.ins:
-                if o in prev_nodes:
-                    continue
-                if isinstance(o, SymbolNode) and o.scope != "local":
-                    continue
-                subpath = self.getDefPath(o, iteration + 1, prev_nodes + [end])
-                if len(subpath) != 0:
-                    subpaths += subpath
-            if len(subpaths) == 0:
-                return []
-            else:
-                paths = []
-                for p in subpaths:
-                    paths.append(p + [end])
-                return paths
+        return list(iterDefPath(end, iteration, copy(prev_nodes), getDefNodes(end, True), True))
 
+    def iterDefPaths(self, node):
+        return iterDefPath(node, 0, [], getDefNodes(node, True), True)
 
     def getDefPaths(self, node):
-        prevbranches = 0
-        nodeid = int(node.nodeid.split("@")[-1])
-        for n in self.branchnodes:
-            if int(n.nodeid.split("@")[-1]) < nodeid:
-                prevbranches += 1
-        for n in self.mergenodes:
-            if int(n.nodeid.split("@")[-1]) < nodeid:
-                prevbranches += 1
-        if prevbranches >= 15:
-            logger.warning("Too many branches before this variable, skipping to avoid path explosion...")
-            return []
-        paths = self.getDefPath(node, 0, [])
-        return paths
+        return getLimitedDefPaths(self.iterDefPaths(node), node)
 
 
     def getUsage(self, name):
@@ -909,6 +1191,9 @@ class TypeGraph(object):
 
 
     def getTypeConlfictNum(self):
+        #handlers do not change during a pass, so check the log levels only once
+        debugging = isLogged(logging.DEBUG)
+        informing = isLogged(logging.INFO)
         changed = True
         iters = 0
 
@@ -918,15 +1203,14 @@ class TypeGraph(object):
 
             changed = False
 
-            queue = self.getNoInputNodes()
+            queue = WorkList(self.getNoInputNodes())
 
             iters += 1
             self.clearVisitLabel()
             inneriter = 0
             while(len(queue) != 0 and inneriter < 1000):
                 inneriter += 1
-                curnode = queue[0]
-                queue.pop(0)
+                curnode = queue.popleft()
                 curnode.visitlabel = 2
 
                 for n in curnode.ins:
@@ -947,35 +1231,40 @@ class TypeGraph(object):
                                     if not isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types, curnode.types):
                                         changed = True
                                         curnode.types = copy(n.types)
-                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
+                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
                                         changed = True
-                                        curnode.types = copy(n.types[n.outs.index(curnode)])
+                                        curnode.types = copy(n.types[n.getSlot(curnode)])
                                 elif not isinstance(n, BranchNode) and  not TypeObject.isSetIncluded(curnode.types, n.types) and len(n.types) != 0:
                                     if [curnode, n] not in inconsistences:
                                         inconsistences.append([curnode, n])
-                                    logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
+                                    if informing:
+                                        logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
                                     #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types) + "}")
-                                elif isinstance(n, BranchNode) and not TypeObject.isSetIncluded(curnode.types, n.types[n.outs.index(curnode)]) and len(n.types[n.outs.index(curnode)]) != 0:
+                                elif isinstance(n, BranchNode) and not TypeObject.isSetIncluded(curnode.types, n.types[n.getSlot(curnode)]) and len(n.types[n.getSlot(curnode)]) != 0:
                                     if [curnode, n] not in inconsistences:
                                         inconsistences.append([curnode, n])
-                                    logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
-                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.outs.index(curnode)]) + "}")
+                                    if informing:
+                                        logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
+                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.getSlot(curnode)]) + "}")
                     elif isinstance(curnode, TypeGenNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         if curnode.op == "call" and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                         elif curnode.op not in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             #TODO:changed = True
                         elif curnode.op in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes, iterable = True):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             #TODO:changed = True
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
+                        if TypeObject.isChanged(prev_types, curnode.types):
                             #logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             changed = True
@@ -983,7 +1272,7 @@ class TypeGraph(object):
                         pass
                     elif isinstance(curnode, MergeNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         curnode.types = []
                         for n in curnode.ins:
                             if not isinstance(n, BranchNode):
@@ -991,19 +1280,21 @@ class TypeGraph(object):
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                             else:
-                                for t in n.types[n.outs.index(curnode)]:
+                                for t in n.types[n.getSlot(curnode)]:
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
                     elif isinstance(curnode, BranchNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = [TypeObject.getFingerprint(curnode.types[0]), TypeObject.getFingerprint(curnode.types[1])]
                         curnode.splitTypes()
-                        if not TypeObject.isIdenticalSet(prev_types[0], curnode.types[0]) or not TypeObject.isIdenticalSet(prev_types[1], curnode.types[1]):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types[0], curnode.types[0]) or TypeObject.isChanged(prev_types[1], curnode.types[1]):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
 
                 for n in curnode.outs:
@@ -1012,18 +1303,20 @@ class TypeGraph(object):
                     elif n.visitlabel == 0:
                         n.visitlabel = 1
                         queue.append(n)
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
-                        else:
-                            logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
+                            else:
+                                logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
                     #this indicate a loop occurs
                     elif n.visitlabel == 1:
                         pass
                     elif n.visitlabel == 2:
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
-                        else:
-                            logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
+                            else:
+                                logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
 
         queue = self.getNodewithRejTypes()
         return len(queue), len(inconsistences)
@@ -1031,46 +1324,72 @@ class TypeGraph(object):
 
 
 
-    def passTypes(self, debug = False):
+    def passTypes(self, debug = False, incremental = False):
+        #handlers do not change during a pass, so check the log levels only once
+        debugging = isLogged(logging.DEBUG)
 
         logger.info("[Static Inference] Start iterating TDG " + self.name)
 
 
+        #in incremental mode, a forward pass only visits the nodes affected by type changes after the last forward pass
+        if not incremental:
+            self.lastpass = None
+        nodeorder = getNodeOrder(self.nodes)
+
         changed = True
         iters = 0
         while(changed and iters < config["max_tdg_iteration"]):
 
-            logger.debug("[Static Inference] iters: " + str(iters))
+            if debugging:
+                logger.debug("[Static Inference] iters: " + str(iters))
 
 
             changed = False
 
             #Forward Passing Types
-            queue = self.getNoInputNodes()
+            affectednodes = None
+            if self.lastpass != None:
+                affectednodes = getAffectedNodes(getChangedNodes(self.nodes, self.lastpass), self.lastpass)
+            if affectednodes == None:
+                queue = WorkList(self.getNoInputNodes())
+                self.clearVisitLabel()
+                maxinneriter = 1000
+            else:
+                queue = WorkList()
+                for n in self.nodes:
+                    if n in affectednodes:
+                        n.visitlabel = 0
+                        if not any(innode in affectednodes for innode in n.ins):
+                            queue.append(n)
+                    else:
+                        n.visitlabel = self.lastpass[n][0]
+                maxinneriter = None
 
-            logger.debug("[Static Inference] Initial nodes:")
-            for n in queue:
-                if isinstance(n, TypeGenNode) and n.name == "call" and n.func != None:
-                    logger.debug("initial node: " + n.name + n.func +  " at Line: " + str(n.lineno))
-                else:
-                    logger.debug("initial node: " + n.name +  " at Line: " + str(n.lineno))
+            if debugging:
+                logger.debug("[Static Inference] Initial nodes:")
+                for n in queue:
+                    if isinstance(n, TypeGenNode) and n.name == "call" and n.func != None:
+                        logger.debug("initial node: " + n.name + n.func +  " at Line: " + str(n.lineno))
+                    else:
+                        logger.debug("initial node: " + n.name +  " at Line: " + str(n.lineno))
                     
             
 
 
             iters += 1
-            self.clearVisitLabel()
             inneriter = 0
-            while(len(queue) != 0 and inneriter < 1000):
+            stalled = 0
+            while(len(queue) != 0 and (maxinneriter == None or inneriter < maxinneriter)):
                 inneriter += 1
-                curnode = queue[0]
-                queue.pop(0)
+                queuesize = len(queue)
+                curnode = queue.popleft()
                 curnode.visitlabel = 2
 
-                if isinstance(curnode, TypeGenNode) and curnode.name == "call" and curnode.func != None:
-                    logger.debug("[Static Inference] visit node: " + curnode.name + curnode.func + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
-                else:
-                    logger.debug("[Static Inference] visit node: " + curnode.name + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
+                if debugging:
+                    if isinstance(curnode, TypeGenNode) and curnode.name == "call" and curnode.func != None:
+                        logger.debug("[Static Inference] visit node: " + curnode.name + curnode.func + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
+                    else:
+                        logger.debug("[Static Inference] visit node: " + curnode.name + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
 
                 for n in curnode.ins:
                     if n.visitlabel < 2:
@@ -1079,7 +1398,8 @@ class TypeGraph(object):
                             queue.append(curnode)
 
                 if curnode.visitlabel == 2:
-                    logger.debug("[Static Inference] This node is finalized.")
+                    if debugging:
+                        logger.debug("[Static Inference] This node is finalized.")
                     if isinstance(curnode, SymbolNode):
                         if len(curnode.ins) > 1:
                             logger.error("[Static Inference] Symbol node should not have more than 1 input nodes.")
@@ -1096,39 +1416,44 @@ class TypeGraph(object):
                                 if curnode.tag != 1 and curnode.tag != 4:
                                     curnode.tag = 3
                                     if not isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types, curnode.types):
-                                        logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
+                                        if debugging:
+                                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
                                         changed = True
                                         curnode.types = copy(n.types)
-                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
-                                        logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
+                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
+                                        if debugging:
+                                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
                                         changed = True
-                                        curnode.types = copy(n.types[n.outs.index(curnode)])
+                                        curnode.types = copy(n.types[n.getSlot(curnode)])
                                 elif not isinstance(n, BranchNode) and  not TypeObject.isIdenticalSet(n.types, curnode.types):
                                     pass
                                     #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types) + "}")
-                                elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
+                                elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
                                     pass
-                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.outs.index(curnode)]) + "}")
+                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.getSlot(curnode)]) + "}")
                     elif isinstance(curnode, TypeGenNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         if curnode.op == "call" and not curnode.performTypingRules(usertype = self.usertypes):
                             pass
                         elif curnode.op not in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #TODO:changed = True
                         elif curnode.op in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes, iterable = True):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #TODO:changed = True
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             changed = True
                     elif isinstance(curnode, TypeNode):
                         curnode.tag = 3
                     elif isinstance(curnode, MergeNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         curnode.types = []
                         for n in curnode.ins:
                             if not isinstance(n, BranchNode):
@@ -1136,19 +1461,21 @@ class TypeGraph(object):
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                             else:
-                                for t in n.types[n.outs.index(curnode)]:
+                                for t in n.types[n.getSlot(curnode)]:
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
                     elif isinstance(curnode, BranchNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = [TypeObject.getFingerprint(curnode.types[0]), TypeObject.getFingerprint(curnode.types[1])]
                         curnode.splitTypes()
-                        if not TypeObject.isIdenticalSet(prev_types[0], curnode.types[0]) or not TypeObject.isIdenticalSet(prev_types[1], curnode.types[1]):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types[0], curnode.types[0]) or TypeObject.isChanged(prev_types[1], curnode.types[1]):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
 
                 for n in curnode.outs:
@@ -1157,24 +1484,42 @@ class TypeGraph(object):
                     elif n.visitlabel == 0:
                         n.visitlabel = 1
                         queue.append(n)
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
-                        else:
-                            logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
+                            else:
+                                logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
                     #this indicate a loop occurs
                     elif n.visitlabel == 1:
                         pass
                     elif n.visitlabel == 2:
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
-                        else:
-                            logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
+                            else:
+                                logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+
+                #all nodes left in the queue wait for each other in loops, the rest of this pass changes nothing
+                if curnode.visitlabel == 1 and len(queue) == queuesize and queue.queue[-1] is curnode:
+                    stalled += 1
+                    if stalled >= len(queue):
+                        break
+                else:
+                    stalled = 0
+
+            if incremental and (len(queue) == 0 or stalled >= len(queue)):
+                self.lastpass = snapshotNodes(self.nodes)
+            else:
+                self.lastpass = None
+
             #Backward Rejecting Types
             
             
             queue = self.getNodewithRejTypes()
             while(len(queue) != 0):
+                innodes = set()
                 for n in queue:
+                    innodes.update(n.ins)
                     if isinstance(n, SymbolNode):
                         endrejtypes = []
                         for t in n.rejtypes:
@@ -1186,8 +1531,8 @@ class TypeGraph(object):
                         if len(n.ins) == 1:
                             if isinstance(n.ins[0], BranchNode):
                                 for t in n.rejtypes:
-                                    if TypeObject.existSame(t, n.ins[0].types[n.ins[0].outs.index(n)]) and t not in endrejtypes:
-                                        n.ins[0].rejtypes[n.ins[0].outs.index(n)].append(t)
+                                    if TypeObject.existSame(t, n.ins[0].types[n.ins[0].getSlot(n)]) and t not in endrejtypes:
+                                        n.ins[0].rejtypes[n.ins[0].getSlot(n)].append(t)
                             else:
                                 for t in n.rejtypes:
                                     if TypeObject.existSame(t, n.ins[0].types) and t not in endrejtypes:
@@ -1195,7 +1540,7 @@ class TypeGraph(object):
                         n.rejtypes = []
                     elif isinstance(n, TypeNode):
                         for t in n.rejtypes:
-                            if TypeObject.findSame(t, n.types) != None:
+                            if debugging and TypeObject.findSame(t, n.types) != None:
                                 logger.debug("Type node at Line: " + str(n.lineno) +  " with type " + TypeObject.resolveTypeName(t) + str(t.added) + " is rejected. ")
                                 #raise ValueError("Type node at Line: " + str(n.lineno) +  " is rejected. " + TypeObject.resolveTypeName(t) + str(t.added))
                         n.rejtypes = []
@@ -1236,7 +1581,11 @@ class TypeGraph(object):
                         n.rejtypes = []
                     else:
                         raise TypeError("Unknown Node.")
-                queue = self.getNodewithRejTypes()
+                #rejected types are only passed to input nodes
+                if nodeorder == None:
+                    queue = self.getNodewithRejTypes()
+                else:
+                    queue = self.getNodewithRejTypes(sorted([n for n in innodes if n in nodeorder], key = lambda n: nodeorder[n]))
                 
                         
 
@@ -1245,23 +1594,32 @@ class TypeGraph(object):
 
 
     
-    def findHotTypes(self):
-        logger.info("[Hot Type Slot Finder] Start finding hot type slots in TDG:" + self.name)
+    def getHotTypes(self):
         queue = self.getEmptySymbols()
         removed = []
+        #remove the nodes dominated by another node in the queue, each node is only visited once for each queue[i]
+        emptyins = {}
         for i in range(0, len(queue)):
+            if len(queue[i].outs) == 0:
+                continue
+            depths = getDominateDepths(set([queue[i]]), queue, emptyins, getDominateScope([queue[i]], emptyins))
             for j in range(0, len(queue)):
-                if i != j and self.isDominate(queue[i], queue[j], 0):
+                if i != j and depths[queue[j]] != None and depths[queue[j]] <= 100:
                     removed.append(queue[j])
         for n in removed:
             if n in queue:
                 queue.remove(n)
         removed = []
 
+        #remove the nodes dominated by the other nodes in the queue together
+        scope = getDominateScope(queue, emptyins)
         for n in queue:
             nodes = copy(queue)
             nodes.remove(n)
-            if self.isSetDominate(nodes, n, 0):
+            if not any(len(m.outs) != 0 for m in nodes):
+                continue
+            depths = getDominateDepths(set(nodes), [n], emptyins, scope)
+            if depths[n] != None and depths[n] <= 100:
                 removed.append(n)
         for n in removed:
             if n in queue:
@@ -1280,6 +1638,19 @@ class TypeGraph(object):
             if n in queue:
                 queue.remove(n)
 
+        return queue
+
+    def findHotTypes(self):
+        logger.info("[Hot Type Slot Finder] Start finding hot type slots in TDG:" + self.name)
+        #hot type slots only depend on which nodes have no types, so reuse the last result if they are the same
+        emptynodes = [n for n in self.nodes if len(n.types) == 0]
+        noneargs = [n for n in self.argnodes if len(n.types) == 1 and n.types[0].type.lower() == "none"]
+        if self.lasthotslots != None and self.lasthotslots[0] == emptynodes and self.lasthotslots[1] == noneargs:
+            queue = copy(self.lasthotslots[2])
+        else:
+            queue = self.getHotTypes()
+            self.lasthotslots = [emptynodes, noneargs, copy(queue)]
+
         for n in queue:
             logger.info("Hot Type: " + n.name + " at Location: [" + str(n.lineno) + "," + str(n.columnno) + "," + str(n.columnend) + "]")
 
@@ -1456,7 +1827,7 @@ class TypeGraph(object):
                 
 
     def storeAttributeTypes(self):
-        if self.name == "__init__":
+        if self.name.split("@")[0] == "__init__":
             for n in self.nodes:
                 if isinstance(n, SymbolNode) and n.scope == "attribute":
                     if n.classname not in self.globaltg.classtypes:
@@ -1729,6 +2100,7 @@ class TypeGraph(object):
                     node = nodetype2load[n["nodetype"]](n)
                     idmap[n["nodeid"]] = node
                     tg.nodes.append(node)
+                    tg.indexNode(node)
                     if dictobj["tg"][0] == tg.name:
                         node.tg = tg
                     elif globaltg != None:
@@ -1816,18 +2188,107 @@ class GlobalTypeGraph(object):
         self.usertypes = usertypes
         self.aliasgraph = AliasGraph()
         self.nodeindex = 0
+        #(nodetype, symbol or op, lineno) -> nodes at that line, in the order they are added
+        self.posindex = {}
         self.callgraph = None
+        #(classname, function name) -> TypeGraph of that function, the summary used by inter-procedural call rules
+        self.functgs = {}
+        #summaries of the repository modules imported by this file, used by call and attribute rules
+        self.importedsummaries = None
 
         self.classtypes = {}
 
+        #state of the last forward pass, used in incremental mode
+        self.lastpass = None
+
     def getTG(self, lineno):
         for i,tg in enumerate(self.tgs):
             if i < len(self.tgs) and self.tgs[i].startlineno > lineno and tg.startlineno <= lineno:
                 return tg
         return None
 
+    def indexNode(self, node):
+        key = getPosKey(node)
+        if key == None:
+            return
+        if key not in self.posindex:
+            self.posindex[key] = [node]
+        else:
+            self.posindex[key].append(node)
+
+    def searchNode(self, nodetype, name, pos):
+        for n in self.posindex.get((nodetype, name, pos[0]), []):
+            if n.columnno == pos[1] and n.columnend == pos[2]:
+                return n
+        return None
+
     def addTG(self, tg):
         self.tgs.append(tg)
+        #keep the first definition, as a linear scan over tgs would
+        key = (tg.classname, tg.name.split("@")[0])
+        if key not in self.functgs:
+            self.functgs[key] = tg
+
+    def getFunctionTG(self, classname, func):
+        return self.functgs.get((classname, func))
+
+    def getCalledTG(self, classname, func, attr):
+        #the tg of a function defined in this module that is called as func() or self.func(), None for other calls
+        if attr == None:
+            return self.getFunctionTG(None, func)
+        elif attr == "self" and classname != None:
+            return self.getFunctionTG(classname, func)
+        return None
+
+    def getCallees(self, tg):
+        callees = []
+        for n in tg.nodes:
+            if isinstance(n, TypeGenNode) and n.op == "call" and n.func != None:
+                t = self.getCalledTG(tg.classname, n.func, n.attr)
+                if t != None and t is not tg and t not in callees:
+                    callees.append(t)
+        return callees
+
+    def getSCCs(self):
+        #strongly connected components of the call relations between tgs, emitted callee-first
+        order = {}
+        for i, tg in enumerate(self.tgs):
+            order[tg] = i
+        sccs = findSCCs(self.tgs, self.getCallees)
+        for scc in sccs:
+            #keep the source order inside a component
+            scc.sort(key = lambda t: order[t])
+        return sccs
+
+    def scheduleTGs(self):
+        #yield tgs so that callees are solved before their callers, members of a recursive component are solved together before they are yielded
+        for scc in self.getSCCs():
+            if len(scc) > 1:
+                self.solveSCC(scc)
+            for t in scc:
+                yield t
+
+    def solveSCC(self, scc):
+        #a member reads the return types of the later members from the previous round,
+        #so another round is only needed when the return types of such a member change
+        position = {}
+        for i, t in enumerate(scc):
+            position[id(t)] = i
+        readearly = set()
+        for i, t in enumerate(scc):
+            for c in self.getCallees(t):
+                if id(c) in position and position[id(c)] > i:
+                    readearly.add(id(c))
+        before = [TypeObject.getFingerprint(t.getReturnType()) for t in scc]
+        rounds = 0
+        while rounds < config["max_scc_iteration"]:
+            rounds += 1
+            for t in scc:
+                t.passTypes(debug = False)
+            after = [TypeObject.getFingerprint(t.getReturnType()) for t in scc]
+            if not any(before[i] != after[i] and id(t) in readearly for i, t in enumerate(scc)):
+                break
+            before = after
 
     def addClassname(self, clsname):
         if isinstance(clsname, list):
@@ -1861,8 +2322,9 @@ class GlobalTypeGraph(object):
                 self.exceptbuffer[self.inexcept - 1][node.symbol] = node
         self.globalnodes.append(node)
         node.tg = self
-        node.nodeid = self.name + "@" + str(self.nodeindex)
+        node.nodeindex = self.nodeindex
         self.nodeindex += 1
+        self.indexNode(node)
         if (isinstance(node, SymbolNode) and node.scope != "local"):
             if (node.symbol not in self.globalsymbols):
                 self.globalsymbols[node.symbol] = [node]
@@ -1913,8 +2375,10 @@ class GlobalTypeGraph(object):
 
     def getNoInputNodes(self):
         noinputnodes = []
+        visited = set()
         for n in self.globalnodes:
-            if len(n.ins) == 0 and n not in noinputnodes:
+            if len(n.ins) == 0 and n not in visited:
+                visited.add(n)
                 noinputnodes.append(n)
         return noinputnodes
     
@@ -1930,9 +2394,11 @@ class GlobalTypeGraph(object):
         for n in self.globalnodes:
             n.visitlabel = 0
 
-    def getNodewithRejTypes(self):
+    def getNodewithRejTypes(self, candidates = None):
+        if candidates == None:
+            candidates = self.globalnodes
         nodes = []
-        for n in self.globalnodes:
+        for n in candidates:
             if not isinstance(n, BranchNode) and len(n.rejtypes) != 0:
                 nodes.append(n)
             elif isinstance(n, BranchNode) and (len(n.rejtypes[0]) != 0 or len(n.rejtypes[1]) != 0):
@@ -1940,30 +2406,13 @@ class GlobalTypeGraph(object):
         return nodes
 
     def getDefPath(self, end, iteration, prev_nodes):
-        if len(end.ins) == 0:
-            return [[end]]
-        elif iteration > config["max_tdg_iteration"]:
-            return []
-        else:
-            subpaths = []
-            for o in end.ins:
-                if o in prev_nodes:
-                    continue
-                subpath = self.getDefPath(o, iteration + 1, prev_nodes + [end])
-                if len(subpath) != 0:
-                    subpaths += subpath
-            if len(subpaths) == 0:
-                return []
-            else:
-                paths = []
-                for p in subpaths:
-                    paths.append(p + [end])
-                return paths
+        return list(iterDefPath(end, iteration, copy(prev_nodes), getDefNodes(end, False), False))
 
+    def iterDefPaths(self, node):
+        return iterDefPath(node, 0, [], getDefNodes(node, False), False)
 
     def getDefPaths(self, node):
-        paths = self.getDefPath(node, 0, [])
-        return paths
+        return getLimitedDefPaths(self.iterDefPaths(node), node)
 
 
     def getAliasUsage(self, name, scope):
@@ -2023,6 +2472,9 @@ class GlobalTypeGraph(object):
 
     
     def getTypeConlfictNum(self):
+        #handlers do not change during a pass, so check the log levels only once
+        debugging = isLogged(logging.DEBUG)
+        informing = isLogged(logging.INFO)
         changed = True
         iters = 0
 
@@ -2032,15 +2484,14 @@ class GlobalTypeGraph(object):
 
             changed = False
 
-            queue = self.getNoInputNodes()
+            queue = WorkList(self.getNoInputNodes())
 
             iters += 1
             self.clearVisitLabel()
             inneriter = 0
             while(len(queue) != 0 and inneriter < 1000):
                 inneriter += 1
-                curnode = queue[0]
-                queue.pop(0)
+                curnode = queue.popleft()
                 curnode.visitlabel = 2
 
                 for n in curnode.ins:
@@ -2061,35 +2512,40 @@ class GlobalTypeGraph(object):
                                     if not isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types, curnode.types):
                                         changed = True
                                         curnode.types = copy(n.types)
-                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
+                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
                                         changed = True
-                                        curnode.types = copy(n.types[n.outs.index(curnode)])
+                                        curnode.types = copy(n.types[n.getSlot(curnode)])
                                 elif not isinstance(n, BranchNode) and  not TypeObject.isSetIncluded(curnode.types, n.types) and len(n.types) != 0:
                                     if [curnode, n] not in inconsistences:
                                         inconsistences.append([curnode, n])
-                                    logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
+                                    if informing:
+                                        logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
                                     #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types) + "}")
-                                elif isinstance(n, BranchNode) and not TypeObject.isSetIncluded(curnode.types, n.types[n.outs.index(curnode)]) and len(n.types[n.outs.index(curnode)]) != 0:
+                                elif isinstance(n, BranchNode) and not TypeObject.isSetIncluded(curnode.types, n.types[n.getSlot(curnode)]) and len(n.types[n.getSlot(curnode)]) != 0:
                                     if [curnode, n] not in inconsistences:
                                         inconsistences.append([curnode, n])
-                                    logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
-                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.outs.index(curnode)]) + "}")
+                                    if informing:
+                                        logger.info(f"inconsistence of {curnode.name}, {n.lineno}; previous node {n.name}, {n.lineno}: current - {TypeObject.resolveTypeNames(curnode.types)} previous node - {TypeObject.resolveTypeNames(n.types)}")
+                                    #logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.getSlot(curnode)]) + "}")
                     elif isinstance(curnode, TypeGenNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         if curnode.op == "call" and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                         elif curnode.op not in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             #TODO:changed = True
                         elif curnode.op in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes, iterable = True):
-                            logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
-                            logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
+                            if informing:
+                                logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                                logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             #TODO:changed = True
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
+                        if TypeObject.isChanged(prev_types, curnode.types):
                             #logger.info("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #logger.info("Current {} nodes have rejected types.".format(len(self.getNodewithRejTypes())))
                             changed = True
@@ -2097,7 +2553,7 @@ class GlobalTypeGraph(object):
                         pass
                     elif isinstance(curnode, MergeNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         curnode.types = []
                         for n in curnode.ins:
                             if not isinstance(n, BranchNode):
@@ -2105,19 +2561,21 @@ class GlobalTypeGraph(object):
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                             else:
-                                for t in n.types[n.outs.index(curnode)]:
+                                for t in n.types[n.getSlot(curnode)]:
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
                     elif isinstance(curnode, BranchNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = [TypeObject.getFingerprint(curnode.types[0]), TypeObject.getFingerprint(curnode.types[1])]
                         curnode.splitTypes()
-                        if not TypeObject.isIdenticalSet(prev_types[0], curnode.types[0]) or not TypeObject.isIdenticalSet(prev_types[1], curnode.types[1]):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types[0], curnode.types[0]) or TypeObject.isChanged(prev_types[1], curnode.types[1]):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
 
                 for n in curnode.outs:
@@ -2126,18 +2584,20 @@ class GlobalTypeGraph(object):
                     elif n.visitlabel == 0:
                         n.visitlabel = 1
                         queue.append(n)
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
-                        else:
-                            logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
+                            else:
+                                logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
                     #this indicate a loop occurs
                     elif n.visitlabel == 1:
                         pass
                     elif n.visitlabel == 2:
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
-                        else:
-                            logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
+                            else:
+                                logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
 
         queue = self.getNodewithRejTypes()
         return len(queue), len(inconsistences)
@@ -2145,47 +2605,73 @@ class GlobalTypeGraph(object):
 
 
 
-    def passTypes(self, debug = False):
+    def passTypes(self, debug = False, incremental = False):
+        #handlers do not change during a pass, so check the log levels only once
+        debugging = isLogged(logging.DEBUG)
 
         #print message
         logger.info("[Static Inference] Start iterating Global TDG " + self.name)
 
 
+        #in incremental mode, a forward pass only visits the nodes affected by type changes after the last forward pass
+        if not incremental:
+            self.lastpass = None
+        nodeorder = getNodeOrder(self.globalnodes)
+
         changed = True
         iters = 0
         while(changed and iters < 100):
 
-            logger.debug("[Static Inference] iters: " + str(iters))
+            if debugging:
+                logger.debug("[Static Inference] iters: " + str(iters))
 
 
             changed = False
 
             #Forward Passing Types
-            queue = self.getNoInputNodes()
+            affectednodes = None
+            if self.lastpass != None:
+                affectednodes = getAffectedNodes(getChangedNodes(self.globalnodes, self.lastpass), self.lastpass)
+            if affectednodes == None:
+                queue = WorkList(self.getNoInputNodes())
+                self.clearVisitLabel()
+                maxinneriter = 1000
+            else:
+                queue = WorkList()
+                for n in self.globalnodes:
+                    if n in affectednodes:
+                        n.visitlabel = 0
+                        if not any(innode in affectednodes for innode in n.ins):
+                            queue.append(n)
+                    else:
+                        n.visitlabel = self.lastpass[n][0]
+                maxinneriter = None
 
-            logger.debug("[Static Inference] Initial nodes:")
-            for n in queue:
-                if isinstance(n, TypeGenNode) and n.name == "call" and n.func != None:
-                    logger.debug("initial node: " + n.name + n.func +  " at Line: " + str(n.lineno))
-                else:
-                    logger.debug("initial node: " + n.name +  " at Line: " + str(n.lineno))
+            if debugging:
+                logger.debug("[Static Inference] Initial nodes:")
+                for n in queue:
+                    if isinstance(n, TypeGenNode) and n.name == "call" and n.func != None:
+                        logger.debug("initial node: " + n.name + n.func +  " at Line: " + str(n.lineno))
+                    else:
+                        logger.debug("initial node: " + n.name +  " at Line: " + str(n.lineno))
                     
             
 
 
             iters += 1
-            self.clearVisitLabel()
             inneriter = 0
-            while(len(queue) != 0 and inneriter < 1000):
+            stalled = 0
+            while(len(queue) != 0 and (maxinneriter == None or inneriter < maxinneriter)):
                 inneriter += 1
-                curnode = queue[0]
-                queue.pop(0)
+                queuesize = len(queue)
+                curnode = queue.popleft()
                 curnode.visitlabel = 2
 
-                if isinstance(curnode, TypeGenNode) and curnode.name == "call" and curnode.func != None:
-                    logger.debug("[Static Inference] visit node: " + curnode.name + curnode.func + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
-                else:
-                    logger.debug("[Static Inference] visit node: " + curnode.name + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
+                if debugging:
+                    if isinstance(curnode, TypeGenNode) and curnode.name == "call" and curnode.func != None:
+                        logger.debug("[Static Inference] visit node: " + curnode.name + curnode.func + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
+                    else:
+                        logger.debug("[Static Inference] visit node: " + curnode.name + " at Line: " + str(curnode.lineno) + " (label:" + str(curnode.visitlabel) + ")")
 
                 for n in curnode.ins:
                     if n.visitlabel < 2:
@@ -2194,7 +2680,8 @@ class GlobalTypeGraph(object):
                             queue.append(curnode)
 
                 if curnode.visitlabel == 2:
-                    logger.debug("[Static Inference] This node is finalized.")
+                    if debugging:
+                        logger.debug("[Static Inference] This node is finalized.")
                     if isinstance(curnode, SymbolNode):
                         if len(curnode.ins) > 1:
                             logger.error("[Static Inference] Symbol node should not have more than 1 input nodes.")
@@ -2204,37 +2691,42 @@ class GlobalTypeGraph(object):
                                 if curnode.tag != 1 and curnode.tag != 4:
                                     curnode.tag = 3
                                     if not isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types, curnode.types):
-                                        logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
+                                        if debugging:
+                                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
                                         changed = True
                                         curnode.types = copy(n.types)
-                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
-                                        logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
+                                    elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
+                                        if debugging:
+                                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "Changed.")
                                         changed = True
-                                        curnode.types = copy(n.types[n.outs.index(curnode)])
+                                        curnode.types = copy(n.types[n.getSlot(curnode)])
                                 elif not isinstance(n, BranchNode) and  not TypeObject.isIdenticalSet(n.types, curnode.types):
                                     logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types) + "}")
-                                elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.outs.index(curnode)], curnode.types):
-                                    logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.outs.index(curnode)]) + "}")
+                                elif isinstance(n, BranchNode) and not TypeObject.isIdenticalSet(n.types[n.getSlot(curnode)], curnode.types):
+                                    logger.warning("[Static Inference] The types of " + curnode.name + " is statically added as: {" + TypeObject.resolveTypeNames(curnode.types) + "}" + "However, the types of input node are: {" +TypeObject.resolveTypeNames(n.types[n.getSlot(curnode)]) + "}")
                     elif isinstance(curnode, TypeGenNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         if curnode.op == "call" and not curnode.performTypingRules(usertype = self.usertypes):
                             pass
                         elif curnode.op not in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #TODO:changed = True
                         elif curnode.op in ["List_Read", "List_Write", "Set_Read", "Dict_Read", "Tuple_Read", "Tuple_Write", "JoinedStr"] and not curnode.performTypingRules(usertype = self.usertypes, iterable = True):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             #TODO:changed = True
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "reject some types.")
                             changed = True
                     elif isinstance(curnode, TypeNode):
                         curnode.tag = 3
                     elif isinstance(curnode, MergeNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = TypeObject.getFingerprint(curnode.types)
                         curnode.types = []
                         for n in curnode.ins:
                             if not isinstance(n, BranchNode):
@@ -2242,19 +2734,21 @@ class GlobalTypeGraph(object):
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                             else:
-                                for t in n.types[n.outs.index(curnode)]:
+                                for t in n.types[n.getSlot(curnode)]:
                                     if not TypeObject.existSame(t, curnode.types):
                                         curnode.types.append(t)
                         curnode.types = curnode.types
-                        if not TypeObject.isIdenticalSet(prev_types, curnode.types):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types, curnode.types):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
                     elif isinstance(curnode, BranchNode):
                         curnode.tag = 3
-                        prev_types = deepcopy(curnode.types)
+                        prev_types = [TypeObject.getFingerprint(curnode.types[0]), TypeObject.getFingerprint(curnode.types[1])]
                         curnode.splitTypes()
-                        if not TypeObject.isIdenticalSet(prev_types[0], curnode.types[0]) or not TypeObject.isIdenticalSet(prev_types[1], curnode.types[1]):
-                            logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
+                        if TypeObject.isChanged(prev_types[0], curnode.types[0]) or TypeObject.isChanged(prev_types[1], curnode.types[1]):
+                            if debugging:
+                                logger.debug("[Static Inference] Node: " + curnode.name + " at Line: " + str(curnode.lineno) + "changed.")
                             changed = True
 
                 for n in curnode.outs:
@@ -2263,24 +2757,42 @@ class GlobalTypeGraph(object):
                     elif n.visitlabel == 0:
                         n.visitlabel = 1
                         queue.append(n)
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
-                        else:
-                            logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Add node: " + n.name + n.func + " at Line: " + str(n.lineno))
+                            else:
+                                logger.debug("[Static Inference] Add node: " + n.name + " at Line: " + str(n.lineno))
                     #this indicate a loop occurs
                     elif n.visitlabel == 1:
                         pass
                     elif n.visitlabel == 2:
-                        if isinstance(n, TypeGenNode) and n.name == "call":
-                            logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
-                        else:
-                            logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+                        if debugging:
+                            if isinstance(n, TypeGenNode) and n.name == "call":
+                                logger.debug("[Static Inference] Node: " + n.name + n.func +  " at Line: " + str(n.lineno) +" has been finalized.")
+                            else:
+                                logger.debug("[Static Inference] Node: " + n.name +  " at Line: " + str(n.lineno) +" has been finalized.")
+
+                #all nodes left in the queue wait for each other in loops, the rest of this pass changes nothing
+                if curnode.visitlabel == 1 and len(queue) == queuesize and queue.queue[-1] is curnode:
+                    stalled += 1
+                    if stalled >= len(queue):
+                        break
+                else:
+                    stalled = 0
+
+            if incremental and (len(queue) == 0 or stalled >= len(queue)):
+                self.lastpass = snapshotNodes(self.globalnodes)
+            else:
+                self.lastpass = None
+
             #Backward Rejecting Types
             
             
             queue = self.getNodewithRejTypes()
             while(len(queue) != 0):
+                innodes = set()
                 for n in queue:
+                    innodes.update(n.ins)
                     if isinstance(n, SymbolNode):
                         endrejtypes = []
                         for t in n.rejtypes:
@@ -2292,8 +2804,8 @@ class GlobalTypeGraph(object):
                         if len(n.ins) == 1:
                             if isinstance(n.ins[0], BranchNode):
                                 for t in n.rejtypes:
-                                    if TypeObject.existSame(t, n.ins[0].types[n.ins[0].outs.index(n)]) and t not in endrejtypes:
-                                        n.ins[0].rejtypes[n.ins[0].outs.index(n)].append(t)
+                                    if TypeObject.existSame(t, n.ins[0].types[n.ins[0].getSlot(n)]) and t not in endrejtypes:
+                                        n.ins[0].rejtypes[n.ins[0].getSlot(n)].append(t)
                             else:
                                 for t in n.rejtypes:
                                     if TypeObject.existSame(t, n.ins[0].types) and t not in endrejtypes:
@@ -2301,7 +2813,7 @@ class GlobalTypeGraph(object):
                         n.rejtypes = []
                     elif isinstance(n, TypeNode):
                         for t in n.rejtypes:
-                            if TypeObject.findSame(t, n.types) != None:
+                            if debugging and TypeObject.findSame(t, n.types) != None:
                                 logger.debug("Type node at Line: " + str(n.lineno) +  " with type " + TypeObject.resolveTypeName(t) + str(t.added) + " is rejected. ")
                                 #raise ValueError("Type node at Line: " + str(n.lineno) +  " is rejected. " + TypeObject.resolveTypeName(t) + str(t.added))
                         n.rejtypes = []
@@ -2342,7 +2854,11 @@ class GlobalTypeGraph(object):
                         n.rejtypes = []
                     else:
                         raise TypeError("Unknown Node.")
-                queue = self.getNodewithRejTypes()
+                #rejected types are only passed to input nodes
+                if nodeorder == None:
+                    queue = self.getNodewithRejTypes()
+                else:
+                    queue = self.getNodewithRejTypes(sorted([n for n in innodes if n in nodeorder], key = lambda n: nodeorder[n]))
                 
                         
 
@@ -2641,6 +3157,7 @@ class GlobalTypeGraph(object):
                     node = nodetype2load[n["nodetype"]](n)
                     globaltg.globalnodes.append(node)
                     idmap[n["nodeid"]] = node
+                    globaltg.indexNode(node)
                     if n["tg"][0] == globaltg.name:
                         node.tg = globaltg
                     else:
@@ -2698,7 +3215,7 @@ class GlobalTypeGraph(object):
                 for t in dictobj["tgs"]:
                     tg = TypeGraph.load(t, globaltg = globaltg)
                     tg.globaltg = globaltg
-                    globaltg.tgs.append(tg)
+                    globaltg.addTG(tg)
                 globaltg.callgraph = dictobj["callgraph"]
                 return globaltg
             except Exception as e:
@@ -2907,7 +3424,7 @@ class AliasGraph(object):
                 for i in n["outs"]:
                     idmap[n["id"]].outs.append(idmap[i])
                 for i in n["alias"]:
-                    idmap[n["alias"]].alias.append(idmap[i])
+                    idmap[n["id"]].alias.append(idmap[i])
             for n in dictobj["rootnodes"]:
                 a.rootnodes.append(idmap[n["id"]])
             return a 
@@ -0,0 +1,559 @@
+import os
+import sys
+import gc
+import ast
+import json
+import mmap
+import struct
+import hashlib
+from array import array
+from hityper.tdg_generator import TDGGenerator
+from hityper.tdg import TypeGraph, GlobalTypeGraph, AliasGraph, SymbolNode, TypeGenNode, TypeNode, BranchNode, MergeNode
+from hityper.typeobject import TypeObject
+from hityper.cache import getCodeVersion, touchCacheFile, writeCacheFile
+from hityper import logger
+
+logger.name = __name__
+
+
+'''
+Compact binary format of TDGs.
+
+A file starts with a header (magic, version, section count) followed by a table of (offset, length) pairs, one per section.
+All integer sections are little-endian int32 arrays aligned to 8 bytes, so they can be used in place from a memory-mapped file:
+strofs/strdata - interned strings, string i is strdata[strofs[i]:strofs[i + 1]]
+types - one row of TYPEROW ints per distinct TypeObject
+nodes - one row of NODEROW ints per node of the global graph and all function graphs
+insofs/ins, outsofs/outs - input and output edges of node i are ins[insofs[i]:insofs[i + 1]] and outs[outsofs[i]:outsofs[i + 1]]
+listofs/lists - pool of lists referenced by nodes, types and graphs, each distinct list object is stored once
+meta - compact JSON of the graph level fields, nodes, types and lists are referred by their indices
+'''
+
+MAGIC = b"HTDG"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+SECTION = struct.Struct("<QQ")
+SECTIONS = ["strofs", "strdata", "types", "nodes", "insofs", "ins", "outsofs", "outs", "listofs", "lists", "meta"]
+
+NODEKINDS = ["Symbol", "TypeGen", "Type", "Branch", "Merge"]
+#kind, owner graph, nodeindex, name, lineno, columnno, columnend, visitlabel, tag, types, rejtypes, and 6 fields depending on the kind
+NODEROW = 17
+#type name, category (scalar), added, startnodename, startnodeorder + 1, compatibletypes, elementtype, keytype, valuetype
+TYPEROW = 9
+
+#items of value lists are tagged with their kinds in the lowest 2 bits
+TAG_TYPE = 0
+TAG_LIST = 1
+TAG_STR = 2
+TAG_NONE = 3
+#scalars that are usually integers but may also be strings, such as the categories of some types
+TAG_INT = 0
+
+#directory that keeps the TDGs generated for each file across runs, None means TDGs are always generated
+tdg_cache_dir = None
+
+
+def setTDGCacheDir(path):
+    global tdg_cache_dir
+    tdg_cache_dir = path
+
+
+def toLittleEndian(arr):
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+class BinaryTDGWriter(object):
+    def __init__(self):
+        self.strings = []
+        self.stringids = {}
+        self.types = array("i")
+        self.typeids = {}
+        self.nodes = []
+        self.nodeids = {}
+        self.listofs = array("i", [0])
+        self.lists = array("i")
+        self.listids = {}
+        self.usertypes = []
+        self.usertypeids = {}
+        #keep the encoded lists alive, so that their ids are not reused by other objects
+        self.keep = []
+
+    def addString(self, s):
+        if s == None:
+            return -1
+        if not isinstance(s, str):
+            raise TypeError("Cannot serialize {} as a string in TDG.".format(type(s)))
+        if s not in self.stringids:
+            self.stringids[s] = len(self.strings)
+            self.strings.append(s)
+        return self.stringids[s]
+
+    def addType(self, t):
+        if id(t) in self.typeids:
+            return self.typeids[id(t)]
+        index = len(self.typeids)
+        self.typeids[id(t)] = index
+        self.keep.append(t)
+        row = [self.addString(t.type), self.addScalar(t.category), 1 if t.added else 0, self.addString(t.startnodename), 0 if t.startnodeorder == None else t.startnodeorder + 1]
+        self.types.extend(row + [0] * (TYPEROW - len(row)))
+        #nested types are added after the row is reserved, so the table can have cycles
+        base = index * TYPEROW
+        self.types[base + 5] = self.addRefs(t.compatibletypes, self.addString)
+        self.types[base + 6] = self.addValues(t.elementtype)
+        self.types[base + 7] = self.addValues(t.keytype)
+        self.types[base + 8] = self.addValues(t.valuetype)
+        return index
+
+    def addNode(self, node):
+        if node not in self.nodeids:
+            self.nodeids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.nodeids[node]
+
+    def addUsertypes(self, usertypes):
+        if id(usertypes) not in self.usertypeids:
+            self.usertypeids[id(usertypes)] = len(self.usertypes)
+            self.usertypes.append(usertypes)
+        return self.usertypeids[id(usertypes)]
+
+    def addList(self, key, items):
+        #lists shared by several owners are stored once, and shared again when loaded
+        if key in self.listids:
+            return self.listids[key]
+        self.lists.extend(items)
+        self.listofs.append(len(self.lists))
+        self.listids[key] = len(self.listofs) - 2
+        return self.listids[key]
+
+    def addRefs(self, l, encoder):
+        if ("refs", id(l)) in self.listids:
+            return self.listids[("refs", id(l))]
+        self.keep.append(l)
+        return self.addList(("refs", id(l)), [encoder(i) for i in l])
+
+    def addValue(self, v):
+        if isinstance(v, TypeObject):
+            return self.addType(v) << 2 | TAG_TYPE
+        elif isinstance(v, list):
+            return self.addValues(v) << 2 | TAG_LIST
+        elif isinstance(v, str):
+            return self.addString(v) << 2 | TAG_STR
+        elif v == None:
+            return TAG_NONE
+        else:
+            raise TypeError("Cannot serialize {} as a type in TDG.".format(type(v)))
+
+    def addScalar(self, v):
+        if isinstance(v, str):
+            return self.addString(v) << 2 | TAG_STR
+        elif v == None:
+            return TAG_NONE
+        else:
+            return int(v) << 2 | TAG_INT
+
+    def addValues(self, l):
+        if ("values", id(l)) in self.listids:
+            return self.listids[("values", id(l))]
+        self.keep.append(l)
+        return self.addList(("values", id(l)), [self.addValue(i) for i in l])
+
+    def addNodeList(self, l):
+        return self.addRefs(l, self.addNode)
+
+    def addNodeDict(self, d):
+        res = {}
+        for k in d:
+            if isinstance(d[k], list):
+                res[k] = self.addNodeList(d[k])
+            else:
+                res[k] = [self.addNode(d[k])]
+        return res
+
+    def addTypeNodeDict(self, d):
+        return [[self.addType(t), self.addNode(d[t])] for t in d]
+
+    def dumpTG(self, tg):
+        meta = {}
+        meta["name"] = tg.name
+        meta["filename"] = tg.filename
+        meta["classname"] = tg.classname
+        meta["usertypes"] = self.addUsertypes(tg.usertypes)
+        meta["inloop"] = tg.inloop
+        meta["intry"] = tg.intry
+        meta["inexcept"] = tg.inexcept
+        meta["startlineno"] = tg.startlineno
+        meta["nodeindex"] = tg.nodeindex
+        meta["nodes"] = self.addNodeList(tg.nodes)
+        meta["symbolnodes"] = self.addNodeDict(tg.symbolnodes)
+        meta["typegennodes"] = self.addNodeDict(tg.typegennodes)
+        meta["typenodes"] = self.addTypeNodeDict(tg.typenodes)
+        meta["branchnodes"] = self.addNodeList(tg.branchnodes)
+        meta["mergenodes"] = self.addNodeList(tg.mergenodes)
+        meta["argnodes"] = self.addNodeList(tg.argnodes)
+        meta["returnvaluenodes"] = self.addNodeList(tg.returnvaluenodes)
+        meta["loopbuffer"] = [self.addNodeList(l) for l in tg.loopbuffer]
+        meta["trybuffer"] = [self.addNodeDict(d) for d in tg.trybuffer]
+        meta["exceptbuffer"] = [self.addNodeDict(d) for d in tg.exceptbuffer]
+        return meta
+
+    def dumpGlobalTG(self, globaltg):
+        meta = {}
+        meta["name"] = globaltg.name
+        meta["usertypes"] = self.addUsertypes(globaltg.usertypes)
+        meta["inloop"] = globaltg.inloop
+        meta["intry"] = globaltg.intry
+        meta["inexcept"] = globaltg.inexcept
+        meta["nodeindex"] = globaltg.nodeindex
+        meta["classnames"] = globaltg.classnames
+        meta["globalnodes"] = self.addNodeList(globaltg.globalnodes)
+        meta["globalsymbols"] = self.addNodeDict(globaltg.globalsymbols)
+        meta["globaltypegennodes"] = self.addNodeDict(globaltg.globaltypegennodes)
+        meta["globaltypenodes"] = self.addTypeNodeDict(globaltg.globaltypenodes)
+        meta["globalbranchnodes"] = self.addNodeList(globaltg.globalbranchnodes)
+        meta["globalmergenodes"] = self.addNodeList(globaltg.globalmergenodes)
+        meta["loopbuffer"] = [self.addNodeList(l) for l in globaltg.loopbuffer]
+        meta["trybuffer"] = [self.addNodeDict(d) for d in globaltg.trybuffer]
+        meta["exceptbuffer"] = [self.addNodeDict(d) for d in globaltg.exceptbuffer]
+        meta["tgs"] = [self.dumpTG(tg) for tg in globaltg.tgs]
+        meta["aliasgraph"] = globaltg.aliasgraph.dump()
+        meta["callgraph"] = globaltg.callgraph
+        meta["classtypes"] = {}
+        for c in globaltg.classtypes:
+            meta["classtypes"][c] = {}
+            for k in globaltg.classtypes[c]:
+                if k == "@id@":
+                    meta["classtypes"][c][k] = globaltg.classtypes[c][k]
+                else:
+                    meta["classtypes"][c][k] = self.addValues(globaltg.classtypes[c][k])
+        return meta
+
+    def dumpNodes(self, globaltg):
+        owners = {id(globaltg): 0}
+        for i, tg in enumerate(globaltg.tgs):
+            owners[id(tg)] = i + 1
+        rows = array("i")
+        insofs = array("i", [0])
+        ins = array("i")
+        outsofs = array("i", [0])
+        outs = array("i")
+        #nodes only reachable through edges are added to the table while it is being written
+        i = 0
+        while i < len(self.nodes):
+            n = self.nodes[i]
+            i += 1
+            row = [NODEKINDS.index(n.nodetype), owners.get(id(n.tg), -1), n.nodeindex, self.addString(n.name), n.lineno, n.columnno, n.columnend, n.visitlabel, n.tag, self.addValues(n.types), self.addValues(n.rejtypes)]
+            if isinstance(n, SymbolNode):
+                row += [self.addString(n.symbol), n.order, self.addString(n.classname), self.addString(n.scope), self.addString(n.ctx), (1 if n.extra else 0) | (2 if n.change else 0)]
+            elif isinstance(n, TypeGenNode):
+                row += [self.addString(n.op), self.addString(n.func), self.addString(n.attr), n.splitindex, self.addValues(n.rejinputtypes)]
+            elif isinstance(n, TypeNode):
+                row += [self.addType(n.type)]
+            elif isinstance(n, BranchNode):
+                row += [self.addString(n.branchvar), self.addValues(n.outtypes)]
+            elif isinstance(n, MergeNode):
+                row += [self.addString(n.mergevar)]
+            rows.extend(row + [0] * (NODEROW - len(row)))
+            ins.extend([self.addNode(m) for m in n.ins])
+            insofs.append(len(ins))
+            outs.extend([self.addNode(m) for m in n.outs])
+            outsofs.append(len(outs))
+        return rows, insofs, ins, outsofs, outs
+
+    def dump(self, globaltg):
+        meta = self.dumpGlobalTG(globaltg)
+        nodes, insofs, ins, outsofs, outs = self.dumpNodes(globaltg)
+        meta["usertypepool"] = self.usertypes
+        strdata = bytearray()
+        strofs = array("i", [0])
+        for s in self.strings:
+            strdata += s.encode("utf-8", "surrogatepass")
+            strofs.append(len(strdata))
+        sections = [toLittleEndian(strofs).tobytes(), bytes(strdata), toLittleEndian(self.types).tobytes(), toLittleEndian(nodes).tobytes(),
+            toLittleEndian(insofs).tobytes(), toLittleEndian(ins).tobytes(), toLittleEndian(outsofs).tobytes(), toLittleEndian(outs).tobytes(),
+            toLittleEndian(self.listofs).tobytes(), toLittleEndian(self.lists).tobytes(), json.dumps(meta, separators = (",", ":")).encode("utf-8")]
+        data = bytearray(HEADER.pack(MAGIC, VERSION, len(sections)))
+        table = len(data)
+        data += bytes(SECTION.size * len(sections))
+        for i, s in enumerate(sections):
+            data += bytes(-len(data) % 8)
+            SECTION.pack_into(data, table + i * SECTION.size, len(data), len(s))
+            data += s
+        return bytes(data)
+
+
+class BinaryTDGReader(object):
+    def __init__(self, data):
+        magic, version, num = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a binary TDG file.")
+        if version != VERSION or num != len(SECTIONS):
+            raise ValueError("Unsupported binary TDG version {}.".format(version))
+        self.views = []
+        self.sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(data, HEADER.size + i * SECTION.size)
+            view = memoryview(data)[offset: offset + length]
+            self.views.append(view)
+            if name in ["strdata", "meta"]:
+                self.sections[name] = view
+            elif sys.byteorder == "little":
+                #int32 arrays are cast in place from the mapped file and converted in one pass, which is much faster than reading them item by item
+                ints = view.cast("i")
+                self.views.append(ints)
+                self.sections[name] = ints.tolist()
+            else:
+                arr = array("i", view)
+                arr.byteswap()
+                self.sections[name] = arr.tolist()
+        self.strings = [None] * (len(self.sections["strofs"]) - 1)
+        self.types = [None] * (len(self.sections["types"]) // TYPEROW)
+        self.nodes = [None] * (len(self.sections["nodes"]) // NODEROW)
+        self.listcache = {}
+
+    def release(self):
+        #views must be released before the memory map is closed
+        self.sections = {}
+        for v in reversed(self.views):
+            v.release()
+        self.views = []
+
+    def getString(self, index):
+        if index < 0:
+            return None
+        if self.strings[index] == None:
+            strofs = self.sections["strofs"]
+            self.strings[index] = bytes(self.sections["strdata"][strofs[index]: strofs[index + 1]]).decode("utf-8", "surrogatepass")
+        return self.strings[index]
+
+    def getList(self, index):
+        listofs = self.sections["listofs"]
+        return self.sections["lists"][listofs[index]: listofs[index + 1]]
+
+    def getRefs(self, index, decoder):
+        key = ("refs", index)
+        if key not in self.listcache:
+            self.listcache[key] = [decoder(i) for i in self.getList(index)]
+        return self.listcache[key]
+
+    def getValue(self, v):
+        tag = v & 3
+        if tag == TAG_TYPE:
+            return self.getType(v >> 2)
+        elif tag == TAG_LIST:
+            return self.getValues(v >> 2)
+        elif tag == TAG_STR:
+            return self.getString(v >> 2)
+        else:
+            return None
+
+    def getScalar(self, v):
+        tag = v & 3
+        if tag == TAG_STR:
+            return self.getString(v >> 2)
+        elif tag == TAG_NONE:
+            return None
+        else:
+            return v >> 2
+
+    def getValues(self, index):
+        key = ("values", index)
+        if key not in self.listcache:
+            self.listcache[key] = [self.getValue(i) for i in self.getList(index)]
+        return self.listcache[key]
+
+    def getType(self, index):
+        if self.types[index] == None:
+            row = self.sections["types"][index * TYPEROW: (index + 1) * TYPEROW]
+            t = TypeObject(self.getString(row[0]), self.getScalar(row[1]), added = row[2] == 1)
+            t.startnodename = self.getString(row[3])
+            t.startnodeorder = None if row[4] == 0 else row[4] - 1
+            #register the type before resolving nested types, so that cycles end here
+            self.types[index] = t
+            t.compatibletypes = self.getRefs(row[5], self.getString)
+            t.elementtype = self.getValues(row[6])
+            t.keytype = self.getValues(row[7])
+            t.valuetype = self.getValues(row[8])
+        return self.types[index]
+
+    def getNode(self, index):
+        return self.nodes[index]
+
+    def getNodeList(self, index):
+        return self.getRefs(index, self.getNode)
+
+    def getNodeDict(self, d, single = False):
+        res = {}
+        for k in d:
+            if single:
+                res[k] = self.nodes[d[k][0]]
+            else:
+                res[k] = self.getNodeList(d[k])
+        return res
+
+    def getTypeNodeDict(self, l):
+        res = {}
+        for t, n in l:
+            res[self.getType(t)] = self.nodes[n]
+        return res
+
+    def loadNodes(self, graphs):
+        rows = self.sections["nodes"]
+        for i in range(0, len(self.nodes)):
+            row = rows[i * NODEROW: (i + 1) * NODEROW]
+            kind = NODEKINDS[row[0]]
+            if kind == "Symbol":
+                node = SymbolNode([], [], self.getString(row[11]), row[12], classname = self.getString(row[13]), scope = self.getString(row[14]), ctx = self.getString(row[15]), extra = row[16] & 1 == 1)
+                node.change = row[16] & 2 == 2
+            elif kind == "TypeGen":
+                node = TypeGenNode(self.getString(row[11]), [], [], func = self.getString(row[12]), attr = self.getString(row[13]), splitindex = row[14])
+                node.rejinputtypes = self.getValues(row[15])
+            elif kind == "Type":
+                node = TypeNode([], self.getType(row[11]))
+            elif kind == "Branch":
+                node = BranchNode([], [], self.getString(row[11]))
+                node.outtypes = self.getValues(row[12])
+            else:
+                node = MergeNode([], [], self.getString(row[11]))
+            node.tg = graphs[row[1]] if row[1] >= 0 else None
+            node.nodeindex = row[2]
+            node.name = self.getString(row[3])
+            node.setNodePos(row[4], row[5], row[6])
+            node.visitlabel = row[7]
+            node.tag = row[8]
+            node.types = self.getValues(row[9])
+            node.rejtypes = self.getValues(row[10])
+            self.nodes[i] = node
+        insofs = self.sections["insofs"]
+        ins = self.sections["ins"]
+        outsofs = self.sections["outsofs"]
+        outs = self.sections["outs"]
+        for i, node in enumerate(self.nodes):
+            #type nodes keep the empty input dict created by their constructor
+            if insofs[i + 1] > insofs[i]:
+                node.ins = [self.nodes[j] for j in ins[insofs[i]: insofs[i + 1]]]
+            node.outs = [self.nodes[j] for j in outs[outsofs[i]: outsofs[i + 1]]]
+
+    def loadTG(self, meta, tg):
+        tg.inloop = meta["inloop"]
+        tg.intry = meta["intry"]
+        tg.inexcept = meta["inexcept"]
+        tg.startlineno = meta["startlineno"]
+        tg.nodeindex = meta["nodeindex"]
+        tg.nodes = self.getNodeList(meta["nodes"])
+        tg.symbolnodes = self.getNodeDict(meta["symbolnodes"])
+        tg.typegennodes = self.getNodeDict(meta["typegennodes"])
+        tg.typenodes = self.getTypeNodeDict(meta["typenodes"])
+        tg.branchnodes = self.getNodeList(meta["branchnodes"])
+        tg.mergenodes = self.getNodeList(meta["mergenodes"])
+        tg.argnodes = self.getNodeList(meta["argnodes"])
+        tg.returnvaluenodes = self.getNodeList(meta["returnvaluenodes"])
+        tg.loopbuffer = [self.getNodeList(l) for l in meta["loopbuffer"]]
+        tg.trybuffer = [self.getNodeDict(d) for d in meta["trybuffer"]]
+        tg.exceptbuffer = [self.getNodeDict(d, single = True) for d in meta["exceptbuffer"]]
+        for n in tg.nodes:
+            tg.indexNode(n)
+
+    def load(self):
+        meta = json.loads(bytes(self.sections["meta"]).decode("utf-8"))
+        usertypes = meta["usertypepool"]
+        globaltg = GlobalTypeGraph(meta["name"], usertypes[meta["usertypes"]])
+        graphs = [globaltg]
+        for t in meta["tgs"]:
+            graphs.append(TypeGraph(t["name"], usertypes[t["usertypes"]], t["filename"], t["classname"], globaltg))
+        self.loadNodes(graphs)
+        globaltg.inloop = meta["inloop"]
+        globaltg.intry = meta["intry"]
+        globaltg.inexcept = meta["inexcept"]
+        globaltg.nodeindex = meta["nodeindex"]
+        globaltg.classnames = meta["classnames"]
+        globaltg.globalnodes = self.getNodeList(meta["globalnodes"])
+        globaltg.globalsymbols = self.getNodeDict(meta["globalsymbols"])
+        globaltg.globaltypegennodes = self.getNodeDict(meta["globaltypegennodes"])
+        globaltg.globaltypenodes = self.getTypeNodeDict(meta["globaltypenodes"])
+        globaltg.globalbranchnodes = self.getNodeList(meta["globalbranchnodes"])
+        globaltg.globalmergenodes = self.getNodeList(meta["globalmergenodes"])
+        globaltg.loopbuffer = [self.getNodeList(l) for l in meta["loopbuffer"]]
+        globaltg.trybuffer = [self.getNodeDict(d) for d in meta["trybuffer"]]
+        globaltg.exceptbuffer = [self.getNodeDict(d, single = True) for d in meta["exceptbuffer"]]
+        for n in globaltg.globalnodes:
+            globaltg.indexNode(n)
+        for i, t in enumerate(meta["tgs"]):
+            self.loadTG(t, graphs[i + 1])
+            globaltg.addTG(graphs[i + 1])
+        globaltg.aliasgraph = AliasGraph.load(meta["aliasgraph"])
+        globaltg.callgraph = meta["callgraph"]
+        globaltg.classtypes = {}
+        for c in meta["classtypes"]:
+            globaltg.classtypes[c] = {}
+            for k in meta["classtypes"][c]:
+                if k == "@id@":
+                    globaltg.classtypes[c][k] = meta["classtypes"][c][k]
+                else:
+                    globaltg.classtypes[c][k] = self.getValues(meta["classtypes"][c][k])
+        return globaltg
+
+
+def encodeTDG(globaltg):
+    return BinaryTDGWriter().dump(globaltg)
+
+
+def decodeTDG(data):
+    reader = BinaryTDGReader(data)
+    #all objects created here live as long as the graph, so there is nothing for the garbage collector to find while decoding
+    gcenabled = gc.isenabled()
+    gc.disable()
+    try:
+        return reader.load()
+    finally:
+        if gcenabled:
+            gc.enable()
+        reader.release()
+
+
+def saveTDG(globaltg, filename):
+    with open(filename, "wb") as f:
+        f.write(encodeTDG(globaltg))
+
+
+def loadTDG(filename):
+    #the file is memory-mapped and only the parts referred by the graphs are decoded
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as m:
+            try:
+                return decodeTDG(m)
+            except Exception as e:
+                logger.error("Cannot resume TDG from {}, reason: {}".format(filename, e))
+                raise
+
+
+def getTDGCacheKey(filename, source, usertypes, optimize, locations, alias):
+    #a TDG only depends on the file, its source, its user-defined types, the options of the generator and the code of the generator
+    if isinstance(locations, list) and len(locations) == 1 and locations[0] == None:
+        locations = None
+    data = json.dumps([VERSION, getCodeVersion(), filename, source, usertypes, optimize, locations, alias], sort_keys = True)
+    return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def buildTDG(filename, source, usertypes, optimize, locations, alias = 0, repo = None, root = None):
+    #generate the TDG of a file, or load it from the cache if the same file has been generated with the same options before
+    #call graphs depend on other files in the repo, so TDGs with call analysis are never cached
+    cachefile = None
+    if tdg_cache_dir != None and repo == None:
+        key = getTDGCacheKey(filename, source, usertypes, optimize, locations, alias)
+        cachefile = os.path.join(tdg_cache_dir, key + ".bin")
+        if touchCacheFile(cachefile):
+            try:
+                globaltg = loadTDG(cachefile)
+                logger.info("Loaded cached TDG of file {} from {}".format(filename, cachefile))
+                return globaltg
+            except Exception as e:
+                logger.warning("Cannot load cached TDG of file {}, regenerating it. Reason: {}".format(filename, e))
+    if root == None:
+        root = ast.parse(source)
+    globaltg = TDGGenerator(filename, optimize, locations, usertypes, alias = alias, repo = repo).run(root)
+    if cachefile != None:
+        writeCacheFile(cachefile, lambda path: saveTDG(globaltg, path))
+    return globaltg
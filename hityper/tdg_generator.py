@@ -301,19 +301,9 @@ class TDGGenerator(ast.NodeVisitor):
 
     def searchNode(self, nodetype, nodename, nodepos):
         if self.curclass == -1 and self.curfunc == -1:
-            for node in self.GlobalTG.globalnodes:
-                if node.nodetype == nodetype and node.lineno == nodepos[0] and node.columnno == nodepos[1] and node.columnend == nodepos[2]:
-                    if nodetype == "TypeGen" and node.op == nodename:
-                        return node
-                    elif nodetype == "Symbol" and node.symbol == nodename:
-                        return node
+            return self.GlobalTG.searchNode(nodetype, nodename, nodepos)
         elif self.curfunc != -1:
-            for node in self.tgstack[self.curfunc].nodes:
-                if node.nodetype == nodetype and node.lineno == nodepos[0] and node.columnno == nodepos[1] and node.columnend == nodepos[2]:
-                    if nodetype == "TypeGen" and node.op == nodename:
-                        return node
-                    elif nodetype == "Symbol" and node.symbol == nodename:
-                        return node
+            return self.tgstack[self.curfunc].searchNode(nodetype, nodename, nodepos)
 
 
 
@@ -1600,7 +1590,7 @@ class TDGGenerator(ast.NodeVisitor):
             if isinstance(var, SymbolNode):
                 if var.scope == "global":
                     self.lastglobalvar[var.name] = n
-                    n.brachvar = var.name + str(self.globalvar2id[var.name])
+                    n.branchvar = var.name + str(self.globalvar2id[var.name])
                 elif var.scope == "local":
                     self.lastlocalvar[self.curfunc][var.name] = n
                     n.branchvar = var.name + str(self.localvar2id[self.curfunc][var.name])
@@ -1,9 +1,69 @@
 import re
+from functools import lru_cache
 from hityper.stdtypes import stdtypes, exporttypemap, inputtypemap, typeequalmap
+from hityper.config import config
 from hityper import logger
 
 logger.name = __name__
 
+
+#canonical key of a type name, each distinct name is resolved only once and shared by all type objects with this name
+class TypeKey(object):
+    def __init__(self, name):
+        self.name = name
+        self.lower = name.lower()
+        self.shortname = self.lower.split(".")[-1]
+        if self.lower in typeequalmap:
+            self.equalclass = typeequalmap[self.lower]
+        else:
+            self.equalclass = None
+
+    #equivalence class derived from typeequalmap, raise KeyError for unknown types as indexing typeequalmap does
+    def getEqualClass(self):
+        if self.equalclass == None:
+            raise KeyError(self.lower)
+        return self.equalclass
+
+
+typekeys = {}
+
+#types that are compared by their element types
+generictypes = ["list", "tuple", "set", "iterable", "optional", "union", "sequence", "generator"]
+#generic types that can include other types with the same head, such as List[a] in List[a, b]
+inclusivetypes = ["List", "Tuple", "Dict", "Set", "Iterable", "Optional", "Union", "Sequence", "Generator"]
+
+
+#positions of types grouped by their heads, a type can only be included in types with the same generic head or in Optional[x] where x has its head
+class TypeSet(object):
+    def __init__(self, types):
+        self.types = types
+        self.heads = {}
+        self.optionals = {}
+        for i, t in enumerate(types):
+            if t.type in inclusivetypes:
+                if t.type not in self.heads:
+                    self.heads[t.type] = []
+                self.heads[t.type].append(i)
+            if t.type == "Optional" and len(t.elementtype) == 1:
+                if t.elementtype[0].type not in self.optionals:
+                    self.optionals[t.elementtype[0].type] = []
+                self.optionals[t.elementtype[0].type].append(i)
+
+    def getCandidates(self, t):
+        return self.heads.get(t.type, []) + self.optionals.get(t.type, [])
+
+    def removeIncluded(self):
+        #same as repeatedly removing the last type that is included in another remaining type:
+        #removals never make a type included, so the types are decided from the last one, and a type is removed if it is included in a kept type after it or in any type before it
+        keep = [True] * len(self.types)
+        for i in range(len(self.types) - 1, -1, -1):
+            for j in self.getCandidates(self.types[i]):
+                if j != i and keep[j] and TypeObject.isIncluded(self.types[i], self.types[j]):
+                    keep[i] = False
+                    break
+        return [t for i, t in enumerate(self.types) if keep[i]]
+
+
 class TypeObject(object):
     def __init__(self, t, category, added = False):
         self.type = t
@@ -54,6 +114,12 @@ class TypeObject(object):
         self.builintypes["rare"] = ["complex", "bytearray", "Frozenset", "memoryview", "range"]
         return self.builintypes
 
+    @staticmethod
+    def getTypeKey(name):
+        if name not in typekeys:
+            typekeys[name] = TypeKey(name)
+        return typekeys[name]
+
     @staticmethod
     def isCompatible(l, r):
         for t in l.compatibletypes:
@@ -86,7 +152,7 @@ class TypeObject(object):
     @staticmethod
     def existOptional(l, listr):
         for t in listr:
-            if t.type.lower() == "optional" and len(t.elementtype) == 1 and typeequalmap[t.elementtype[0].type.lower()] == typeequalmap[l.type.lower()]:
+            if TypeObject.getTypeKey(t.type).lower == "optional" and len(t.elementtype) == 1 and TypeObject.getTypeKey(t.elementtype[0].type).getEqualClass() == TypeObject.getTypeKey(l.type).getEqualClass():
                 return True
         return False
 
@@ -121,40 +187,45 @@ class TypeObject(object):
 
     @staticmethod
     def isIdentical( l, r):
-
+        if l is r:
+            return True
+        lkey = TypeObject.getTypeKey(l.type)
+        rkey = TypeObject.getTypeKey(r.type)
         if l.category != 0 and r.category != 0:
             if l.type == r.type:
                 return True
-            elif l.category == r.category and l.category == 2 and (l.type.split(".")[-1].lower() == r.type.split(".")[-1].lower()):
+            elif l.category == r.category and l.category == 2 and lkey.shortname == rkey.shortname:
                 return True
             else:
                 return False
         if  l.category == 0 and r.category == 0:
-            if typeequalmap[l.type.lower()] == typeequalmap[r.type.lower()]:
-                if l.type.lower() not in ["list", "tuple", "set", "iterable", "optional", "union", "sequence", "generator", "dict"]:
+            if lkey.getEqualClass() == rkey.getEqualClass():
+                if lkey.lower not in generictypes and lkey.lower != "dict":
                     return True
                 else:
-                    if l.type.lower() == "dict" and TypeObject.isIdenticalSet(l.keytype, r.keytype) and TypeObject.isIdenticalSet(l.valuetype, r.valuetype):
+                    if lkey.lower == "dict" and TypeObject.isIdenticalSet(l.keytype, r.keytype) and TypeObject.isIdenticalSet(l.valuetype, r.valuetype):
                         return True
-                    elif l.type.lower() in ["list", "tuple", "set", "iterable", "optional", "union", "sequence", "generator"] and TypeObject.isIdenticalSet(l.elementtype, r.elementtype):
+                    elif lkey.lower in generictypes and TypeObject.isIdenticalSet(l.elementtype, r.elementtype):
                         return True
-            elif (l.type.lower() == "literal" and typeequalmap[r.type.lower()] <= 3) or (r.type.lower() == "literal" and typeequalmap[l.type.lower()] <= 3):
+            elif (lkey.lower == "literal" and rkey.getEqualClass() <= 3) or (rkey.lower == "literal" and lkey.getEqualClass() <= 3):
                 return True
-            elif (l.type.lower() == "iterable" and typeequalmap[r.type.lower()] <= 17 and typeequalmap[r.type.lower()] >= 11) or (r.type.lower() == "iterable" and typeequalmap[l.type.lower()] <= 17 and typeequalmap[l.type.lower()] >= 11):
+            elif (lkey.lower == "iterable" and rkey.getEqualClass() <= 17 and rkey.getEqualClass() >= 11) or (rkey.lower == "iterable" and lkey.getEqualClass() <= 17 and lkey.getEqualClass() >= 11):
                 return True
-        if l.category == 0 and r.category == 2 and l.type.lower() == "type" and len(l.elementtype) == 1:
+        if l.category == 0 and r.category == 2 and lkey.lower == "type" and len(l.elementtype) == 1:
             return TypeObject.isIdentical(l.elementtype[0], r)
-        if r.category == 0 and l.category == 2 and r.type.lower() == "type" and len(r.elementtype) == 1:
+        if r.category == 0 and l.category == 2 and rkey.lower == "type" and len(r.elementtype) == 1:
             return TypeObject.isIdentical(r.elementtype[0], l)
-        if (l.category == 2 or r.category == 2) and l.type.split(".")[-1].lower() == r.type.split(".")[-1].lower():
+        if (l.category == 2 or r.category == 2) and lkey.shortname == rkey.shortname:
             return True
         return False
     
     @staticmethod
     def isSimilar(l,r):
-        if l.category == 0 and r.category == 0 and typeequalmap[l.type.lower()] == typeequalmap[r.type.lower()]:
+        lkey = TypeObject.getTypeKey(l.type)
+        rkey = TypeObject.getTypeKey(r.type)
+        if l.category == 0 and r.category == 0 and lkey.getEqualClass() == rkey.getEqualClass():
             return True
-        elif l.type.lower() == r.type.lower():
+        elif lkey.lower == rkey.lower:
             return True
         else:
             return False
@@ -162,30 +233,27 @@ class TypeObject(object):
     @staticmethod
     def isIdenticalSet( llist, rlist):
         
-        invalidtypes = []
-        for l in llist:
-            if not isinstance(l, TypeObject):
-                invalidtypes.append(l)
-        for r in rlist:
-            if not isinstance(r, TypeObject):
-                invalidtypes.append(r)
-        
-        for t in invalidtypes:
-            if t in llist:
-                llist.remove(t)
-        for t in invalidtypes:
-            if t in rlist:
-                rlist.remove(t)
+        #ignore the invalid types without removing them from the given lists
+        llist = [l for l in llist if isinstance(l, TypeObject)]
+        rlist = [r for r in rlist if isinstance(r, TypeObject)]
+
+        #the same type objects in the same order, which is the common case when types are passed without changes
+        if len(llist) == len(rlist):
+            for i in range(0, len(llist)):
+                if llist[i] is not rlist[i]:
+                    break
+            else:
+                return True
         
         for l in llist:
-            if l.type.lower() == "any":
+            if TypeObject.getTypeKey(l.type).lower == "any":
                 return True
-            if not TypeObject.existSame(l, rlist) and l.type.lower() != "any":
+            if not TypeObject.existSame(l, rlist):
                 return False
         for r in rlist:
-            if r.type.lower() == "any":
+            if TypeObject.getTypeKey(r.type).lower == "any":
                 return True
-            if not TypeObject.existSame(r, llist) and r.type.lower() != "any":
+            if not TypeObject.existSame(r, llist):
                 return False
         return True
 
@@ -193,23 +261,23 @@ class TypeObject(object):
     def existType(t, listr):
         for r in listr:
             if isinstance(t, str):
-                if (r.category == 0 and typeequalmap[t.lower()] == typeequalmap[r.type.lower()]) or (r.category == 2 and r.type == t):
+                if (r.category == 0 and TypeObject.getTypeKey(t).getEqualClass() == TypeObject.getTypeKey(r.type).getEqualClass()) or (r.category == 2 and r.type == t):
                     return True
             elif isinstance(t, TypeObject):
-                if (r.category == 0 and t.category == 0 and typeequalmap[t.type.lower()] == typeequalmap[r.type.lower()]) or (t.type == r.type):
+                if (r.category == 0 and t.category == 0 and TypeObject.getTypeKey(t.type).getEqualClass() == TypeObject.getTypeKey(r.type).getEqualClass()) or (t.type == r.type):
                     return True
         return False
 
     @staticmethod
     def equal2type(t, typestr):
-        if typeequalmap[t.type.lower()] == typeequalmap[typestr.lower()]:
+        if TypeObject.getTypeKey(t.type).getEqualClass() == TypeObject.getTypeKey(typestr).getEqualClass():
             return True
         return False
 
     @staticmethod
     def equal2onetype(t, typestrs):
         for s in typestrs:
-            if typeequalmap[t.type.lower()] == typeequalmap[s.lower()]:
+            if TypeObject.getTypeKey(t.type).getEqualClass() == TypeObject.getTypeKey(s).getEqualClass():
                 return True
         return False
 
@@ -247,7 +315,7 @@ class TypeObject(object):
             return True
         elif l.type != r.type:
             return False
-        elif l.type == r.type and l.type in ["List", "Tuple", "Dict", "Set", "Iterable", "Optional", "Union", "Sequence", "Generator"]:
+        elif l.type == r.type and l.type in inclusivetypes:
             if l.type == "Dict":
                 for t in l.keytype:
                     if not TypeObject.existSame(t, r.keytype) and not TypeObject.existOptional(t, r.keytype) and not TypeObject.existIncluded(t, r.keytype):
@@ -331,19 +399,9 @@ class TypeObject(object):
     @staticmethod
     def removeInclusiveTypes(listt):
         outs = TypeObject.removeRedundantTypes(listt)
-        removed = True
-        
-        while removed:
-            removed = False
-            for i in range(0, len(outs)):
-                for j in range(0, len(outs)):
-                    if i != j and TypeObject.isIncluded(outs[i], outs[j]):
-                        removed = True
-                        target = outs[i]
-                        break
-            if removed and target in outs:
-                outs.remove(target)
-        return outs
+        if len(outs) < 2:
+            return outs
+        return TypeSet(outs).removeIncluded()
 
     @staticmethod
     def removeInvalidTypes(t):
@@ -368,82 +426,80 @@ class TypeObject(object):
         return TypeObject.resolveTypeName(self)
             
 
+    @staticmethod
+    def getSignature(t):
+        #structural identity of a type, all types with the same signature are rendered to the same name
+        return (t.type, t.category, tuple(TypeObject.getSignature(i) for i in t.elementtype if isinstance(i, TypeObject)), tuple(TypeObject.getSignature(i) for i in t.keytype if isinstance(i, TypeObject)), tuple(TypeObject.getSignature(i) for i in t.valuetype if isinstance(i, TypeObject)))
+
+    @staticmethod
+    def getFingerprint(types):
+        #immutable snapshot of a type list, replacing deepcopy when checking whether the types of a node change
+        return tuple(TypeObject.getSignature(t) for t in types if isinstance(t, TypeObject))
+
+    @staticmethod
+    def isChanged(fingerprint, types):
+        #identical fingerprints always mean identical sets, other cases fall back to isIdenticalSet
+        #since it also treats some different types as identical, such as Any
+        if fingerprint == TypeObject.getFingerprint(types):
+            return False
+        return not TypeObject.isIdenticalSet([TypeObject.fromSignature(s) for s in fingerprint], types)
+
+    @staticmethod
+    def fromSignature(signature):
+        t = TypeObject(signature[0], signature[1])
+        t.elementtype = [TypeObject.fromSignature(i) for i in signature[2]]
+        t.keytype = [TypeObject.fromSignature(i) for i in signature[3]]
+        t.valuetype = [TypeObject.fromSignature(i) for i in signature[4]]
+        return t
+
     @staticmethod
     def resolveTypeName(t):
         if isinstance(t, TypeObject):
-            t = TypeObject.removeInvalidTypes(t)
-            t = TypeObject.simplifyGenericType(t)
             if t.category != 0:
                 return t.type
-            elif t.type.lower() not in exporttypemap:
-                raise TypeError("Unknown type: " + t.type)
-            typestr = exporttypemap[t.type.lower()]
-            if t.type.lower() in ["dict", "callable"] and len(t.keytype) + len(t.valuetype) > 0:
-                typestr = typestr + "["
-                if len(t.keytype) == 0:
-                    typestr += ", "
-                elif len(t.keytype) == 1:
-                    typestr = typestr + TypeObject.resolveTypeName(t.keytype[0]) + ", "
-                else:
-                    typestr += "typing.Union["
-                    for n in t.keytype:
-                        typestr = typestr + TypeObject.resolveTypeName(n) + ","
-                    typestr = typestr[:-1]
-                    typestr += "], "
-                if len(t.valuetype) == 0:
-                    pass
-                elif len(t.valuetype) == 1:
-                    typestr = typestr + TypeObject.resolveTypeName(t.valuetype[0])
-                else:
-                    typestr += "typing.Union["
-                    for n in t.valuetype:
-                        typestr = typestr + TypeObject.resolveTypeName(n) + ","
-                    typestr = typestr[:-1]
-                    typestr += "]"
-                typestr += "]"
-            elif t.type.lower() in ["set", "tuple", "list", "awaitable", "iterable", "sequence", "generator"] and len(t.elementtype) > 0:
-                typestr = typestr + "["
-                if len(t.elementtype) == 1:
-                    typestr = typestr + TypeObject.resolveTypeName(t.elementtype[0])
-                elif len(t.elementtype) == 2 and (t.elementtype[0].type == "None" or t.elementtype[1].type == "None"):
-                    typestr += "typing.Optional["
-                    for i in t.elementtype:
-                        if i.type != "None":
-                            typestr = typestr + TypeObject.resolveTypeName(i) 
-                    typestr += "]"
-                elif len(t.elementtype) >= 2:
-                    typestr += "typing.Union["
-                    for n in t.elementtype:
-                        typestr = typestr + TypeObject.resolveTypeName(n) + ","
-                    typestr = typestr[:-1]
-                    typestr += "]"
-                typestr += "]"
-            elif t.type.lower() == "optional" and len(t.elementtype) > 0:
-                typestr += "["
-                if len(t.elementtype) > 1:
-                    typestr += "typing.Union["
-                    for n in t.elementtype:
-                        typestr = typestr + TypeObject.resolveTypeName(n) + ","
-                    typestr = typestr[:-1]
-                    typestr += "]"
-                elif len(t.elementtype) == 1:
-                    typestr = typestr + TypeObject.resolveTypeName(t.elementtype[0]) + "]"
-                else:
-                    typestr += "]"
-            elif t.type.lower() == "union" and len(t.elementtype) > 0:
-                typestr += "["
-                if len(t.elementtype) == 0:
-                    typestr += "]"
-                if len(t.elementtype) == 1:
-                    typestr = typestr + TypeObject.resolveTypeName(t.elementtype[0]) + "]"
-                elif len(t.elementtype) > 1:
-                    for n in t.elementtype:
-                        typestr = typestr + TypeObject.resolveTypeName(n) + ","
-                    typestr = typestr[:-1]
-                    typestr += "]"
-            return typestr
+            return TypeObject._cachedTypeName(TypeObject.getSignature(t))
         else:
             raise TypeError("t should be a TypeObject.")
+
+    #types are rendered again and again in dumped results and logs, so names are cached by signatures
+    #a name is rendered from a new object built from the signature, since simplifying generic types modifies the object
+    @staticmethod
+    @lru_cache(maxsize = config["typename_cache_size"])
+    def _cachedTypeName(signature):
+        t = TypeObject.simplifyGenericType(TypeObject.fromSignature(signature))
+        if t.type.lower() not in exporttypemap:
+            raise TypeError("Unknown type: " + t.type)
+        typestr = exporttypemap[t.type.lower()]
+        if t.type.lower() in ["dict", "callable"] and len(t.keytype) + len(t.valuetype) > 0:
+            typestr = typestr + "["
+            if len(t.keytype) == 0:
+                typestr += ", "
+            elif len(t.keytype) == 1:
+                typestr = typestr + TypeObject.resolveTypeName(t.keytype[0]) + ", "
+            else:
+                typestr += "typing.Union[" + ",".join([TypeObject.resolveTypeName(n) for n in t.keytype]) + "], "
+            if len(t.valuetype) == 1:
+                typestr = typestr + TypeObject.resolveTypeName(t.valuetype[0])
+            elif len(t.valuetype) > 1:
+                typestr += "typing.Union[" + ",".join([TypeObject.resolveTypeName(n) for n in t.valuetype]) + "]"
+            typestr += "]"
+        elif t.type.lower() in ["set", "tuple", "list", "awaitable", "iterable", "sequence", "generator"] and len(t.elementtype) > 0:
+            typestr = typestr + "["
+            if len(t.elementtype) == 1:
+                typestr = typestr + TypeObject.resolveTypeName(t.elementtype[0])
+            elif len(t.elementtype) == 2 and (t.elementtype[0].type == "None" or t.elementtype[1].type == "None"):
+                typestr += "typing.Optional[" + "".join([TypeObject.resolveTypeName(i) for i in t.elementtype if i.type != "None"]) + "]"
+            elif len(t.elementtype) >= 2:
+                typestr += "typing.Union[" + ",".join([TypeObject.resolveTypeName(n) for n in t.elementtype]) + "]"
+            typestr += "]"
+        elif t.type.lower() == "optional" and len(t.elementtype) > 0:
+            if len(t.elementtype) > 1:
+                typestr += "[typing.Union[" + ",".join([TypeObject.resolveTypeName(n) for n in t.elementtype]) + "]"
+            else:
+                typestr += "[" + TypeObject.resolveTypeName(t.elementtype[0]) + "]"
+        elif t.type.lower() == "union" and len(t.elementtype) > 0:
+            typestr += "[" + ",".join([TypeObject.resolveTypeName(n) for n in t.elementtype]) + "]"
+        return typestr
     
     @staticmethod
     def resolveTypeNames(tlist):
@@ -588,10 +644,13 @@ class TypeObject(object):
             strobjs.append(typeobj)
             return strobjs
 
+    #the same type strings are parsed again and again in typing rules and recommendations, so the parsed objects are cached
+    #spaces are removed first in _Str2Obj, so they do not distinguish type strings
     @staticmethod
-    def Str2Obj(typestr):
+    @lru_cache(maxsize = config["str2obj_cache_size"])
+    def _cachedStr2Obj(typestr):
         if typestr.count("[") != typestr.count("]"):
-            return []
+            return ()
         else:
             typeobjs = TypeObject._Str2Obj(typestr)
             queue = typeobjs
@@ -599,11 +658,33 @@ class TypeObject(object):
                 obj = queue[0]
                 queue = queue[1:]
                 if obj.category == 2 and ("[" in obj.type or "]" in obj.type):
-                    return []
+                    return ()
                 queue += obj.elementtype
                 queue += obj.keytype
                 queue += obj.valuetype
-            return typeobjs
+            return tuple(typeobjs)
+
+    @staticmethod
+    def Str2Obj(typestr):
+        #type objects are modified in place by callers, so every call gets its own copies of the cached objects
+        typeobjs = []
+        for t in TypeObject._cachedStr2Obj(typestr.replace(" ", "")):
+            typeobjs.append(TypeObject.copyType(t))
+        return typeobjs
+
+    @staticmethod
+    def copyType(t):
+        obj = TypeObject(t.type, t.category, added = t.added)
+        obj.compatibletypes = list(t.compatibletypes)
+        obj.startnodename = t.startnodename
+        obj.startnodeorder = t.startnodeorder
+        for i in t.elementtype:
+            obj.elementtype.append(TypeObject.copyType(i))
+        for i in t.keytype:
+            obj.keytype.append(TypeObject.copyType(i))
+        for i in t.valuetype:
+            obj.valuetype.append(TypeObject.copyType(i))
+        return obj
 
     @staticmethod
     def DumpObject(typeobj):
@@ -4,118 +4,174 @@ from hityper import logger
 from copy import copy, deepcopy
 from hityper.stdtypes import builtin_method_properties, special_types, builtin_method
 
+
+#types that own each built-in member function, built once from builtin_method
+builtin_method_owners = {}
+for k in builtin_method:
+    if k != "standalone":
+        for f in builtin_method[k]:
+            if f not in builtin_method_owners:
+                builtin_method_owners[f] = []
+            builtin_method_owners[f].append(k)
+
 logger.name == __name__
 
 class TypingRule(object):
+    #handlers of each operation, resolved once for each operation and whether it has more than one operand
+    handlers = {}
+
     def __init__(self):
         pass
 
-    def check_failed(self, ori, rej):
-        if len(ori) == len(rej):
-            logger.warning("All types are rejected.")
+    @staticmethod
+    def getHandler(op, binary):
+        if (op, binary) not in TypingRule.handlers:
+            TypingRule.handlers[(op, binary)] = TypingRule.resolveHandler(op, binary)
+        return TypingRule.handlers[(op, binary)]
 
-    def sub_act(self, operands , op, func, attr, usertypes, iterable=False, curnode = None):
-        if not iterable:
-            if len(operands) > 0:
-                left = operands[0]
-            else:
-                left = None
-            right = None
-            if(len(operands)>1):
-                right = operands[1]
-            else:
-                right = None
-            if(left != None and (not isinstance(left, hityper.tdg.GraphBaseNode)) or (right != None and not isinstance(right, hityper.tdg.GraphBaseNode))):
-                raise ValueError("Operands must be a graph node")
+    #all handlers are called with (rule, operands, left, right, op, func, attr, usertypes, curnode)
+    @staticmethod
+    def resolveHandler(op, binary):
         if (op in ["and", "or"]):
-            return self.binop_and_or(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_and_or(left, right)
         elif (op == "not"):
-            return self.unop_not(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_not(left, right)
         elif (op in ["<", "<=", ">", ">="]):
-            return self.binop_compare_neq(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_compare_neq(left, right)
         elif (op in ["==", "!=", "is", "is not"]):
-            return self.binop_compare_eq(left, right)
-        elif (op == "+" and right != None):
-            return self.binop_add(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_compare_eq(left, right)
+        elif (op == "+" and binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_add(operands)
         elif (op == "*"):
-            return self.binop_mul(left, right)
-        elif (op in ["-", "/", "//", "%", "**", "pow"] and right != None):
-            return self.binop_num_op(left, right, op)
-        elif (op in ["+", "-", "abs"] and right == None):
-            return self.NumRemainSame(left, right)
-        elif (op == "int" and right == None):
-            return self.unop_int(left, right)
-        elif (op == "float" and right == None):
-            return self.unop_float(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_mul(left, right)
+        elif (op in ["-", "/", "//", "%", "**", "pow"] and binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_num_op(left, right, op)
+        elif (op in ["+", "-", "abs"] and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.NumRemainSame(left, right)
+        elif (op == "int" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_int(left, right)
+        elif (op == "float" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_float(left, right)
         elif (op == "divmod"):
-            return self.binop_divmod(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_divmod(left, right)
         elif (op in ["|", "^", "&", "<<", ">>"]):
-            return self.binop_int_op(operands, func, attr, usertypes)
-        elif (op == "~" and right == None):
-            return self.unop_int_op(left, right)
-        elif (op == "bytes" and right == None):
-            return self.unop_bytes(left, right)
-        elif (op == "str" and right == None):
-            return self.unop_str(left, right)
-        elif (op == "tuple" and right == None):
-            return self.unop_tuple(left, right)
-        elif (op == "list" and right == None):
-            return self.unop_list(left, right)
-        elif (op == "set" and right == None):
-            return self.unop_set(left, right)
-        elif (op == "dict" and right == None):
-            return self.unop_dict(left, right)
-        elif (op == "type" and right == None):
-            return self.unop_type(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_int_op(operands, func, attr, usertypes)
+        elif (op == "~" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_int_op(left, right)
+        elif (op == "bytes" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_bytes(left, right)
+        elif (op == "str" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_str(left, right)
+        elif (op == "tuple" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_tuple(left, right)
+        elif (op == "list" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_list(left, right)
+        elif (op == "set" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_set(left, right)
+        elif (op == "dict" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_dict(left, right)
+        elif (op == "type" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_type(left, right)
         elif (op in ["in", "not in"] ):
-            return self.binop_in(left, right)
-        elif (op == "forin" and right == None):
-            return self.unop_forin(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_in(left, right)
+        elif (op == "forin" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_forin(left, right)
         elif (op == "append"):
-            return self.binop_append(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_append(left, right)
         elif (op == "Subscript_Write"):
-            return self.triop_subscript(operands, func, attr, usertypes)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.triop_subscript(operands, func, attr, usertypes)
         elif (op == "Subscript_Read"):
-            return self.binop_subscript(operands, func, attr, usertypes)
-        elif (op == "=" and right == None):
-            return self.unop_assign(left, right)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.binop_subscript(operands, func, attr, usertypes)
+        elif (op == "=" and not binary):
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unop_assign(left, right)
         elif (op == "call"):
-            return self.call(operands, func, attr, usertypes, curnode)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.call(operands, func, attr, usertypes, curnode)
         elif (op == "List_Read"):
-            return self.List_Read(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.List_Read(operands)
         elif( op == "List_Write"):
-            return self.List_Write(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.List_Write(operands)
         elif(op == "Tuple_Read"):
-            return self.Tuple_Read(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.Tuple_Read(operands)
         elif(op == "Tuple_Write"):
-            return  self.Tuple_Write(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.Tuple_Write(operands)
         elif(op == "Set_Read"):
-            return self.Set_Read(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.Set_Read(operands)
         elif(op =="Dict_Read"):
-            return  self.Dict_Read(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.Dict_Read(operands)
         elif(op == "JoinedStr"):
-            return self.JoinedStr(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.JoinedStr(operands)
         elif(op=="."):
-            return self.Attribution_Return(operands, existstype=None)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.Attribution_Return(operands, existstype=None, attr=attr, curnode=curnode)
         elif(op=="ListComp"):
-            return  self.listcomp_Return(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.listcomp_Return(operands)
         elif(op=="SetComp"):
-            return self.setcomp_Return(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.setcomp_Return(operands)
         elif(op=="DictComp"):
-            return self.dictcomp_Retrun(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.dictcomp_Retrun(operands)
         elif(op=="GeneratorExp"):
-            return self.GeneratorExp_Return(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.GeneratorExp_Return(operands)
         elif(op=="yield"):
-            return self.yieldop(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.yieldop(operands)
         elif(op=="IfExp"):
-            return self.IfExp(operands)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.IfExp(operands)
         else:
-            return self.unknown_op(operands, op)
-            #raise TypeError("Unknown Operation: " + op)
+            return lambda rule, operands, left, right, op, func, attr, usertypes, curnode: rule.unknown_op(operands, op)
+
+
+    def getGlobalTG(self, curnode):
+        if curnode == None or curnode.tg == None:
+            return None
+        if isinstance(curnode.tg, hityper.tdg.TypeGraph):
+            return curnode.tg.globaltg
+        else:
+            return curnode.tg
+
+    def getImportedSummaries(self, curnode):
+        globaltg = self.getGlobalTG(curnode)
+        if globaltg == None:
+            return None
+        return globaltg.importedsummaries
+
+    def getLocalReturnType(self, curnode, func, attr):
+        #return types of a call of a function defined in the current module, None if the call does not refer to such a function or it is not solved yet
+        globaltg = self.getGlobalTG(curnode)
+        if globaltg == None:
+            return None
+        classname = curnode.tg.classname if isinstance(curnode.tg, hityper.tdg.TypeGraph) else None
+        t = globaltg.getCalledTG(classname, func, attr)
+        if t == None or t is curnode.tg:
+            return None
+        returntypes = t.getReturnType()
+        if len(returntypes) == 0:
+            return None
+        return returntypes
+
+    def check_failed(self, ori, rej):
+        if len(ori) == len(rej):
+            logger.warning("All types are rejected.")
 
-    def act(self, operands , op, func, attr, usertypes, iterable=False, curnode = None):
+    def sub_act(self, operands , op, func, attr, usertypes, iterable=False, curnode = None, handler = None):
+        left = None
+        right = None
+        if not iterable:
+            if len(operands) > 0:
+                left = operands[0]
+            else:
+                left = None
+            right = None
+            if(len(operands)>1):
+                right = operands[1]
+            else:
+                right = None
+            if(left != None and (not isinstance(left, hityper.tdg.GraphBaseNode)) or (right != None and not isinstance(right, hityper.tdg.GraphBaseNode))):
+                raise ValueError("Operands must be a graph node")
+        if handler == None:
+            handler = TypingRule.getHandler(op, len(operands) > 1)
+        return handler(self, operands, left, right, op, func, attr, usertypes, curnode)
+
+    def act(self, operands , op, func, attr, usertypes, iterable=False, curnode = None, handler = None):
         #if not about iterable
-        res = self.sub_act(operands , op, func, attr, usertypes, iterable=False, curnode = curnode)
+        res = self.sub_act(operands , op, func, attr, usertypes, iterable=False, curnode = curnode, handler = handler)
         if res==None:
             logger.warning("POSIIBLE NONE RETURN op is:" + op if op != "call" else "POSIIBLE NONE RETURN op is:" + func)
         return res
@@ -927,6 +983,27 @@ class TypingRule(object):
                 typeobject = TypeObject(func, 2)
                 return rej_types, [typeobject]
 
+            #====================================================================
+            #            case 1.1: inter-procedural analysis
+            #====================================================================
+            #functions and methods defined in the current module, typed by the return types of their TDGs
+            returntypes = self.getLocalReturnType(curnode, func, attr)
+            if returntypes != None:
+                rej_types = []
+                for i in range(0, len(operands)):
+                    rej_types.append([])
+                return rej_types, returntypes
+
+            #functions and methods defined in other modules of the repository, typed by the summaries of those modules
+            imported = self.getImportedSummaries(curnode)
+            if imported != None:
+                returntypes = imported.getReturnType(func, attr, operands[0].types if attr != None and len(operands) > 0 else [])
+                if returntypes != None:
+                    rej_types = []
+                    for i in range(0, len(operands)):
+                        rej_types.append([])
+                    return rej_types, returntypes
+
 
             #====================================================================
             #                  case 2: built-in function
@@ -945,13 +1022,13 @@ class TypingRule(object):
                     rej_target_types = []
                     rej_arg_types = []
                     outs = []
-                    accpetable_targettypes = []
                     returntypes = []
                     for i in range(1, len(operands)):
                         rej_arg_types.append([])
-                    for k in builtin_method:
-                        if func in builtin_method[k] and k != "standalone":
-                            accpetable_targettypes.append(k)
+                    if func in builtin_method_owners:
+                        accpetable_targettypes = copy(builtin_method_owners[func])
+                    else:
+                        accpetable_targettypes = []
                     for t in target.types:
                         if TypeObject.existSame(t, accpetable_targettypes):
                             rule = builtin_method[TypeObject.findSame(t, accpetable_targettypes)][func]
@@ -2284,25 +2361,7 @@ class TypingRule(object):
                     return rej_ltypes, outs
 
             #====================================================================
-            #              case 3: inter-procedural Analysis
-            #====================================================================
-            elif curnode.tg != None and curnode.tg.globaltg != None:
-                rej_types = []
-                for i in range(0, len(operands)):
-                    rej_types.append([])
-                outs = []
-                for t in curnode.tg.globaltg.tgs:
-                    if t.classname == curnode.tg.classname and t.name == func and func != curnode.tg.name:
-                        returntype = t.getReturnType()
-                        if len(returntype) == 0:
-                            return rej_types, outs
-                        else:
-                            outs += returntype
-                            return rej_types, outs
-                return rej_types, outs            
-            
-            #====================================================================
-            #              case 4: unrecognized functions
+            #              case 3: unrecognized functions
             #====================================================================
             else:
                 rej_types = []
@@ -2480,8 +2539,12 @@ class TypingRule(object):
             outs = [TypeObject("Text", 0)]
         return rej_types, outs
 
-    def Attribution_Return(self,operands,existstype=None):
+    def Attribution_Return(self,operands,existstype=None,attr=None,curnode=None):
         outs = []
+        #attributes of classes defined in other modules of the repository
+        imported = self.getImportedSummaries(curnode)
+        if imported != None and attr != None and len(operands) > 0:
+            outs += imported.getAttributeType(attr, operands[0].types)
         '''
         if existstype==None:
             # it means no existstype here
@@ -1,10 +1,13 @@
 import ast
 import sys, getopt
 import os
-import glob
+import json
+import hashlib
+from copy import copy
 from hityper.typeobject import TypeObject
+from hityper.cache import getCodeVersion, touchCacheFile, writeCacheFile
 from hityper import logger
-from func_timeout import func_set_timeout, FunctionTimedOut
+from func_timeout import FunctionTimedOut
 from hityper.stdtypes import stdtypes
 
 
@@ -12,6 +15,37 @@ logger.name = __name__
 
 scaned_files = []
 
+#classes, class attributes and parent classes found in each module, indexed by the hash of module source and the code of HiTyper
+analyzed_modules = {}
+#directory that persists analyzed_modules across runs, None means only caching in memory
+module_cache_dir = None
+#index of python files in each repository, shared by all UsertypeFinder instances
+repo_indexes = {}
+
+def setModuleCacheDir(path):
+    global module_cache_dir
+    module_cache_dir = path
+
+
+def analyzeModule(path):
+    source = open(path, "r").read()
+    key = hashlib.sha256((getCodeVersion() + "\n" + source).encode("utf-8", "surrogatepass")).hexdigest()
+    if key not in analyzed_modules:
+        cachefile = os.path.join(module_cache_dir, key + ".json") if module_cache_dir != None else None
+        if touchCacheFile(cachefile):
+            with open(cachefile, "r", encoding = "utf-8") as cf:
+                analyzed_modules[key] = cf.read()
+        else:
+            root = ast.parse(source)
+            a = ASTVisitor()
+            classes = a.run(root, 1)
+            analyzed_modules[key] = json.dumps({"classes": classes, "classattributes": a.classattributes, "parentclasses": a.parentclasses})
+            if cachefile != None:
+                writeCacheFile(cachefile, analyzed_modules[key])
+    #every caller gets its own copy since the results are merged into and modified with the final types
+    res = json.loads(analyzed_modules[key])
+    return res["classes"], res["classattributes"], res["parentclasses"]
+
 def transformConstant(node):
     if not isinstance(node, ast.Constant):
         raise ValueError("Only Support Constant AST node.")
@@ -196,6 +230,53 @@ class ASTVisitor(ast.NodeVisitor):
         self.visit(node)
         return self.classes
 
+
+class RepoIndex(object):
+    def __init__(self, repo):
+        self.repo = repo
+        #relative path suffix (e.g., a/b.py) -> files ending with it, ordered like glob.glob(repo + "/**/" + suffix, recursive = True)
+        self.files = {}
+        #directories containing __init__.py, ordered like os.walk(repo)
+        self.packages = []
+        #directory -> [relative path components, visiting order of each ancestor directory, number of leading ancestors that glob can match]
+        dirs = {repo: [[], [0], 1]}
+        order = 0
+        for root, subdirs, files in os.walk(repo):
+            parts, orders, visible = dirs[root]
+            if root != repo:
+                order += 1
+                orders = orders + [order]
+                #glob does not match hidden directories with **
+                if visible == len(parts) and not parts[-1].startswith("."):
+                    visible += 1
+            for d in subdirs:
+                dirs[os.path.join(root, d)] = [parts + [d], orders, visible]
+            if "__init__.py" in files:
+                self.packages.append(root)
+            for f in files:
+                if not f.endswith(".py"):
+                    continue
+                path = os.path.join(root, f)
+                relpath = parts + [f]
+                for i in range(0, visible):
+                    suffix = "/".join(relpath[i:])
+                    if suffix not in self.files:
+                        self.files[suffix] = []
+                    self.files[suffix].append([orders[i], path])
+        for suffix in self.files:
+            self.files[suffix] = [p[1] for p in sorted(self.files[suffix], key = lambda p: p[0])]
+
+    def find(self, suffix):
+        if suffix in self.files:
+            return copy(self.files[suffix])
+        else:
+            return []
+
+def getRepoIndex(repo):
+    if repo not in repo_indexes:
+        repo_indexes[repo] = RepoIndex(repo)
+    return repo_indexes[repo]
+
 class UsertypeFinder(object):
     def __init__(self, path, repo, validate):
         self.types = []                     #raw types directly imported
@@ -274,12 +355,11 @@ class UsertypeFinder(object):
         return ".".join(paths)
 
     def scan_module(self):
-        for i in os.walk("/".join(self.repopaths)):
-            if "__init__.py" in i[2]:
-                if self.platform == "win32" and i[0].split("\\")[-1] not in self.userdefinedmodules:
-                    self.userdefinedmodules[i[0].split("\\")[-1]] = i[0]
-                elif i[0].split("\\")[-1] not in self.userdefinedmodules:
-                    self.userdefinedmodules[i[0].split("/")[-1]] = i[0]
+        for i in getRepoIndex("/".join(self.repopaths)).packages:
+            if self.platform == "win32" and i.split("\\")[-1] not in self.userdefinedmodules:
+                self.userdefinedmodules[i.split("\\")[-1]] = i
+            elif i.split("\\")[-1] not in self.userdefinedmodules:
+                self.userdefinedmodules[i.split("/")[-1]] = i
 
     
     def find_file(self, path):
@@ -296,11 +376,12 @@ class UsertypeFinder(object):
         '''
         filepath = path.replace(".", "/") + ".py"
         filepath2 = path.replace(".", "/") + "/__init__.py"
-        files = glob.glob("/".join(self.repopaths) + "/**/" + filepath, recursive = True)
+        repoindex = getRepoIndex("/".join(self.repopaths))
+        files = repoindex.find(filepath)
         if len(files) >= 1:
             return files
         else:
-            files = glob.glob("/".join(self.repopaths) + "/**/" + filepath2, recursive = True)
+            files = repoindex.find(filepath2)
             if len(files) >= 1:
                 return files
             else:
@@ -345,12 +426,8 @@ class UsertypeFinder(object):
         elif(os.path.isfile(filepath + ".py") and filepath not in scaned_files):
             scaned_files.append(filepath)
             finalpath = filepath + ".py"
-            source = open(finalpath, "r").read()
-            root = ast.parse(source)
-            a = ASTVisitor()
-            classes = a.run(root, 1)
-            classattributes = a.classattributes
-            self.mergesubtype(a.parentclasses)
+            classes, classattributes, parentclasses = analyzeModule(finalpath)
+            self.mergesubtype(parentclasses)
             for c in classes:
                 self.finaltypes["indirect"].append([finalpath, self.transformpath(filepath, self.repopaths), c, self.getclassattr(classattributes, c)])
             return 1
@@ -374,9 +451,9 @@ class UsertypeFinder(object):
                     self.finaltypes["unrecognized_modules"].append(e[0].split(".")[0])
 
         for m in self.onlyimportedmodules:
-            files = glob.glob("/".join(self.repopaths) + "/**/" + m + "/__init__.py", recursive = True)
+            files = getRepoIndex("/".join(self.repopaths)).find(m + "/__init__.py")
             if len(files) == 0 and "." in m:
-                files = glob.glob("/".join(self.repopaths) + "/**/" + m.replace(".", "/") + ".py", recursive = True)
+                files = getRepoIndex("/".join(self.repopaths)).find(m.replace(".", "/") + ".py")
             for f in files:
                 finaltypes = self.parse_initfiles(f, self.repopaths)
                 for t in finaltypes["direct"]:
@@ -401,12 +478,8 @@ class UsertypeFinder(object):
             filepath = self.buildpath(t[2], t[0])
             if os.path.isfile(filepath + ".py"):
                 finalpath = filepath + ".py"
-                source = open(finalpath, "r").read()
-                root = ast.parse(source)
-                a = ASTVisitor()
-                classes = a.run(root, 1)
-                classattributes = a.classattributes
-                self.mergesubtype(a.parentclasses)
+                classes, classattributes, parentclasses = analyzeModule(finalpath)
+                self.mergesubtype(parentclasses)
                 if(t[1] in classes):
                     self.finaltypes["direct"].append([finalpath, self.transformpath(filepath, self.repopaths), t[1], self.getclassattr(classattributes, t[1])])
             elif os.path.isfile(filepath + "/__init__.py"):
@@ -434,12 +507,8 @@ class UsertypeFinder(object):
                                     self.finaltypes["direct"].append([f[0], f[1], t[1], f[3]])
 
                         if finalpath != None and os.path.isfile(finalpath):
-                            source = open(finalpath, "r").read()
-                            root = ast.parse(source)
-                            a = ASTVisitor()
-                            classes = a.run(root, 1)
-                            classattributes = a.classattributes
-                            self.mergesubtype(a.parentclasses)
+                            classes, classattributes, parentclasses = analyzeModule(finalpath)
+                            self.mergesubtype(parentclasses)
                             if(t[1] in classes):
                                 self.finaltypes["direct"].append([finalpath, self.transformpath(filepath, self.repopaths), t[1], self.getclassattr(classattributes, t[1])])
                 else:
@@ -517,10 +586,6 @@ class UsertypeFinder(object):
         logger.info("Finished finding user-defined types...")
         return self.finaltypes, self.parentclasses
 
-    @func_set_timeout(300)
-    def invoke(self, node):
-        return self.run(node)
-
     def print_as_csv(self, verbose):
         for d in self.finaltypes["direct"]:
             print(d[0] + "," + d[1] + "," + d[2])
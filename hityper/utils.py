@@ -1,19 +1,34 @@
 import requests
+from requests.adapters import HTTPAdapter
 from hityper.config import config
 from hityper.typeobject import TypeObject
 from hityper import logger
 from hityper.tdg import *
 from hityper.tdg_generator import TDGGenerator
-from hityper.usertype_finder import UsertypeFinder
+from hityper.usertype_finder import UsertypeFinder, scaned_files, setModuleCacheDir
+import hityper.usertype_finder
+from hityper.tdg_binary import buildTDG, setTDGCacheDir
+import hityper.tdg_binary
+from hityper.module_summary import setSummaryCacheDir, orderModules, loadImportedSummaries, summarizeModule, saveModuleSummary
+import hityper.module_summary
+from hityper.cache import getCodeVersion, touchCacheFile, writeCacheFile
 import os, sys
 import ast
+import time
+import signal
+import threading
+import traceback
 from tqdm import tqdm
 import json
+import hashlib
 from gensim.models import Word2Vec
 import numpy as np
 from transformers import RobertaTokenizer
-from multiprocessing.dummy import Pool as ThreadPool
-from func_timeout import func_set_timeout, FunctionTimedOut
+from multiprocessing import Pool as ProcessPool
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import queue
+from func_timeout import func_timeout, FunctionTimedOut
 
 
 logger.name = __name__
@@ -75,12 +90,103 @@ def detectChange(prev_types, types):
 
     return False
 
+class RecommendationClient(object):
+    #HTTP client of the recommendation model, requests share keep-alive connections and run in a thread pool so that they overlap with static analysis
+    def __init__(self, url, cachedir = None, connections = 8, timeout = 60, retries = 3):
+        self.url = url
+        self.cachedir = cachedir
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers = connections)
+        #source hash -> future of the response, identical sources are only requested once
+        self.requests = {}
+        #the thread pool does not survive fork, processes other than the creator must build their own client
+        self.pid = os.getpid()
+
+    def getKey(self, source):
+        return hashlib.sha256((self.url + "\n" + source).encode("utf-8", "surrogatepass")).hexdigest()
+
+    @staticmethod
+    def isTransient(e):
+        #only failures that may go away are retried: connection errors, timeouts and server errors, requests rejected by the API are not sent again
+        if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+            return True
+        return isinstance(e, requests.HTTPError) and e.response != None and e.response.status_code >= 500
+
+    def fetch(self, source, key):
+        cachefile = os.path.join(self.cachedir, key + ".json") if self.cachedir != None else None
+        if touchCacheFile(cachefile):
+            with open(cachefile, "r", encoding = "utf-8") as cf:
+                return json.loads(cf.read())
+        res = None
+        for i in range(0, self.retries + 1):
+            try:
+                r = self.session.post(self.url, source.encode("utf-8", "surrogatepass"), proxies = {"http": None}, timeout = self.timeout)
+                r.raise_for_status()
+                res = r.json()
+                break
+            except Exception as e:
+                if not self.isTransient(e) or i == self.retries:
+                    logger.error("Error occurs when getting recommendations from Type4Py, reason: {}.".format(e))
+                    return None
+                logger.warning("Failed to get recommendations from Type4Py, retrying. Reason: {}.".format(e))
+                time.sleep(0.5 * 2 ** i)
+        #only valid responses are cached, so that failed files are requested again in the next run
+        if cachefile != None and isinstance(res, dict) and res.get("response") != None:
+            writeCacheFile(cachefile, json.dumps(res))
+        return res
+
+    def request(self, source):
+        #start requesting the recommendations of source in background and return the future of the response
+        key = self.getKey(source)
+        if key not in self.requests:
+            self.requests[key] = self.executor.submit(self.fetch, source, key)
+        return self.requests[key]
+
+    def get(self, source):
+        res = self.request(source).result()
+        #responses are handed out once and only kept in the persistent cache afterwards
+        self.requests.pop(self.getKey(source), None)
+        return parseRecommendations(res)
+
+    def close(self):
+        self.executor.shutdown(wait = True)
+        self.session.close()
+
+
+recommendation_client = None
+recommendation_cache_dir = None
+
+def setRecommendationCacheDir(path):
+    global recommendation_cache_dir, recommendation_client
+    recommendation_cache_dir = path
+    recommendation_client = None
+
+
+def getRecommendationClient():
+    global recommendation_client
+    if recommendation_client == None or recommendation_client.pid != os.getpid() or recommendation_client.url != config[config["default_model"]]:
+        recommendation_client = RecommendationClient(config[config["default_model"]], cachedir = recommendation_cache_dir, connections = config["recommendation_connections"], timeout = config["recommendation_timeout"], retries = config["recommendation_retries"])
+    return recommendation_client
+
+
 def getRecommendations(source):
-    try:
-        r = requests.post(config[config["default_model"]], source, proxies = {"http": None})
-        res = r.json()
-    except Exception as e:
-        logger.error("Error occurs when getting recommendations from Type4Py, reason: {}.".format(e))
+    return getRecommendationClient().get(source)
+
+
+def closeRecommendationClient():
+    global recommendation_client
+    if recommendation_client != None and recommendation_client.pid == os.getpid():
+        recommendation_client.close()
+    recommendation_client = None
+
+
+def parseRecommendations(res):
+    if res == None:
         return None
     if not isinstance(res, dict) or res["response"] == None:
         logger.error("Type4Py cannot generate predictions for current source file.")
@@ -147,61 +253,44 @@ def getRecommendations(source):
     return rec
 
 
-def test_multiplefile(gtfile, detailed_gtfile, usertype_file, recfile = None, recmodel = False, topn = 1, prefix = None, eval = False):
-    with open(gtfile, "r", encoding = "utf-8") as gf:
-        gts = json.loads(gf.read())
-    with open(detailed_gtfile, "r", encoding = "utf-8") as gf:
-        detailed_gts = json.loads(gf.read())
-    with open(usertype_file, "r", encoding = "utf-8") as uf:
-        usertypes = json.loads(uf.read())
-    if recfile:
-        with open(recfile, "r", encoding = "utf-8") as rf:
-            recommendations = json.loads(rf.read())
-    else:
-        recommendations = None
-
-    if config["simmodel"]!= None:
-        simmodel = SimModel(config[config["simmodel"]], config["tokenizer"])
-    else:
-        simmodel = None
-    
+def newEvalData(keys):
     data = {}
-    predictions = {}
-    for k in detailed_gts:
+    for k in keys:
         data[k] = {"total": 0, "success": {"arg": 0, "return": 0, "local": 0, "total": 0}, "nores": {"arg": 0, "return": 0, "local": 0, "total": 0}, "similar": {"arg": 0, "return": 0, "local": 0, "total": 0}, "partial": {"arg": 0, "return": 0, "local": 0, "total": 0},  "failed": {"arg": 0, "return": 0, "local": 0, "total": 0}, "acc": 0.0, "recall": 0.0, "similaracc": 0.0, "similarrecall": 0.0, "partialacc": 0.0, "partialrecall": 0.0, "file": 0}
-    
-    num = 0
-    for f in tqdm(gts, desc = "Inferring types"):
-        num +=1
-        logger.info("++++++++++++++++++++++[{}/{}]Infer file {}++++++++++++++++++++++".format(num, len(gts), f))
-        res, str_results = test_onefile("", f, gts = detailed_gts, usertypes = usertypes, recommendations = recommendations, recmodel = recmodel, topn = topn, simmodel = simmodel, prefix = prefix, eval = eval)
-        if res == None:
-            continue
-        predictions[f] = str_results
-        for k in res:
-            for i in res[k]:
-                if i == "total":
-                    data[k][i] += res[k][i]
-                elif i in ["success", "nores", "failed", "similar", "partial"]:
-                    for j in res[k][i]:
-                        data[k][i][j] += res[k][i][j]
-            if (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) != 0:
-                data[k]["acc"] = data[k]["success"]["total"] / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
-                data[k]["similaracc"] = (data[k]["success"]["total"] + data[k]["similar"]["total"]) / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
-                data[k]["partialacc"] = (data[k]["success"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
-            else:
-                data[k]["acc"] = "Not Valid"
-                data[k]["similaracc"] = "Not Valid"
-                data[k]["partialacc"] = "Not Valid"
-            if data[k]["total"] != 0:
-                data[k]["recall"] = data[k]["success"]["total"] / data[k]["total"]
-                data[k]["similarrecall"] = (data[k]["success"]["total"] + data[k]["similar"]["total"]) / data[k]["total"]
-                data[k]["partialrecall"] = (data[k]["success"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) / data[k]["total"]
-            else:
-                data[k]["recall"] = "Not Valid"
-                data[k]["similarrecall"] = "Not Valid"
-                data[k]["partialrecall"] = "Not Valid"
+    return data
+
+
+def mergeEvalData(data, partial):
+    #partial is either the result of one file or the data accumulated by another shard, only counts are merged so the merge order does not matter
+    for k in partial:
+        data[k]["total"] += partial[k]["total"]
+        for i in ["success", "nores", "failed", "similar", "partial"]:
+            for j in partial[k][i]:
+                data[k][i][j] += partial[k][i][j]
+        if "file" in partial[k]:
+            data[k]["file"] += partial[k]["file"]
+        else:
             data[k]["file"] += 1
+
+
+def reportEvalData(data):
+    for k in data:
+        if (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) != 0:
+            data[k]["acc"] = data[k]["success"]["total"] / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
+            data[k]["similaracc"] = (data[k]["success"]["total"] + data[k]["similar"]["total"]) / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
+            data[k]["partialacc"] = (data[k]["success"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) / (data[k]["success"]["total"] + data[k]["failed"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"])
+        elif data[k]["file"] != 0:
+            data[k]["acc"] = "Not Valid"
+            data[k]["similaracc"] = "Not Valid"
+            data[k]["partialacc"] = "Not Valid"
+        if data[k]["total"] != 0:
+            data[k]["recall"] = data[k]["success"]["total"] / data[k]["total"]
+            data[k]["similarrecall"] = (data[k]["success"]["total"] + data[k]["similar"]["total"]) / data[k]["total"]
+            data[k]["partialrecall"] = (data[k]["success"]["total"] + data[k]["similar"]["total"] + data[k]["partial"]["total"]) / data[k]["total"]
+        elif data[k]["file"] != 0:
+            data[k]["recall"] = "Not Valid"
+            data[k]["similarrecall"] = "Not Valid"
+            data[k]["partialrecall"] = "Not Valid"
     seconddata = {}
     seconddata["arg"] = {"success": 0, "similar": 0, "partial": 0, "failed": 0, "nores": 0, "total": 0, "acc": 0, "recall": 0, "similaracc": 0, "similarrecall": 0, "partialacc": 0, "partialrecall": 0}
     seconddata["return"] = {"success": 0, "similar": 0, "partial": 0, "failed": 0, "nores": 0, "total": 0, "acc": 0, "recall": 0, "similaracc": 0, "similarrecall": 0, "partialacc": 0, "partialrecall": 0}
@@ -236,8 +325,79 @@ def test_multiplefile(gtfile, detailed_gtfile, usertype_file, recfile = None, re
         logger.info("Result for {}: Acc - {}, Recall - {}, Similar_Acc - {}, Similar_Recall - {}, Partial_Acc - {}, Partial_Recall - {}, Total - {}, Success Details - {}, Similar Details - {}, Partial Details - {}, Failure Details - {}, No Res Details - {}".format(k, data[k]["acc"], data[k]["recall"], data[k]["similaracc"], data[k]["similarrecall"], data[k]["partialacc"], data[k]["partialrecall"], data[k]["total"], data[k]["success"], data[k]["similar"], data[k]["partial"], data[k]["failed"], data[k]["nores"]))
     for k in seconddata:
         logger.info("Result for {}: Acc - {}, Recall - {}, Similar_Acc - {}, Similar_Recall - {}, Partial_Acc - {}, Partial_Recall - {}, Total - {}".format(k, seconddata[k]["acc"], seconddata[k]["recall"], seconddata[k]["similaracc"], seconddata[k]["similarrecall"], seconddata[k]["partialacc"], seconddata[k]["partialrecall"], seconddata[k]["total"]))
+
+
+#ground truths and settings shared by all files evaluated in the current (worker) process
+worker_evalargs = None
+
+def initevalworker(evalargs):
+    global worker_evalargs
+    worker_evalargs = evalargs
+
+
+def evalfile(f):
+    gts, usertypes, recommendations, recmodel, topn, simmodel, prefix, eval = worker_evalargs
+    logger.info("++++++++++++++++++++++Infer file {}++++++++++++++++++++++".format(f))
+    res, str_results = test_onefile("", f, gts = gts[f] if f in gts else {}, usertypes = usertypes, recommendations = recommendations, recmodel = recmodel, topn = topn, simmodel = simmodel, prefix = prefix, eval = eval)
+    return f, res, str_results
+
+
+def getShard(files, shard):
+    #shard: [i, n], the i-th (starting from 1) of n disjoint parts of the files, assigned round-robin so that every part gets a similar mix of files
+    if shard == None:
+        return files
+    return [f for index, f in enumerate(files) if index % shard[1] == shard[0] - 1]
+
+
+def test_multiplefile(gtfile, detailed_gtfile, usertype_file, recfile = None, recmodel = False, topn = 1, prefix = None, eval = False, jobs = 1, shard = None):
+    with open(gtfile, "r", encoding = "utf-8") as gf:
+        gts = json.loads(gf.read())
+    with open(detailed_gtfile, "r", encoding = "utf-8") as gf:
+        detailed_gts = json.loads(gf.read())
+    with open(usertype_file, "r", encoding = "utf-8") as uf:
+        usertypes = json.loads(uf.read())
+    if recfile:
+        with open(recfile, "r", encoding = "utf-8") as rf:
+            recommendations = json.loads(rf.read())
+    else:
+        recommendations = None
+
+    if config["simmodel"]!= None:
+        simmodel = SimModel(config[config["simmodel"]], config["tokenizer"])
+    else:
+        simmodel = None
+
+    #index the ground truths by file once, test_onefile then only looks at the ground truths of its own file
+    filegts = {}
+    for k in detailed_gts:
+        for f in detailed_gts[k]:
+            if f not in filegts:
+                filegts[f] = {}
+            filegts[f][k] = {f: detailed_gts[k][f]}
     
-    return predictions
+    data = newEvalData(detailed_gts)
+    predictions = {}
+    files = getShard(list(gts.keys()), shard)
+    evalargs = (filegts, usertypes, recommendations, recmodel, topn, simmodel, prefix, eval)
+    if jobs > 1:
+        pool = ProcessPool(jobs, initializer = initevalworker, initargs = (evalargs, ))
+        results = pool.imap(evalfile, files)
+    else:
+        pool = None
+        initevalworker(evalargs)
+        results = map(evalfile, files)
+    for f, res, str_results in tqdm(results, total = len(files), desc = "Inferring types"):
+        if res == None:
+            continue
+        predictions[f] = str_results
+        mergeEvalData(data, res)
+    if pool != None:
+        pool.close()
+        pool.join()
+
+    if shard == None:
+        reportEvalData(data)
+    return predictions, data
                     
 
     
@@ -302,9 +462,9 @@ def test_onefile(gtfile, filename, gts = None, gentg = False, usertypes = None,
     results = {}
     str_results = {}
     if recommendations != None and "global" in recommendations and "global" in recommendations["global"]:
-        global_tg.passTypes(debug = False)
+        global_tg.passTypes(debug = False, incremental = True)
         global_tg.recommendType(recommendations, formatUserTypes(usertype), usertype["module"], topn, simmodel = simmodel)
-        global_tg.passTypes(debug = False)
+        global_tg.passTypes(debug = False, incremental = True)
     else:
         global_tg.passTypes(debug = False)
     global_tg.simplifyTypes()
@@ -313,7 +473,7 @@ def test_onefile(gtfile, filename, gts = None, gentg = False, usertypes = None,
     if gentg == True:
         logger.info("TDG dumped.")
         global_tg.draw(filerepo = "testtgs")
-    for tg in global_tg.tgs:
+    for tg in global_tg.scheduleTGs():
         if tg.name in locations:
             try:
                 if recommendations != None:
@@ -321,10 +481,10 @@ def test_onefile(gtfile, filename, gts = None, gentg = False, usertypes = None,
                     iters = 0
                     while changed and iters < 20:
                         iters += 1
-                        tg.passTypes(debug = False)
+                        tg.passTypes(debug = False, incremental = True)
                         types = tg.findHotTypes()
                         tg.recommendType(types, recommendations, formatUserTypes(usertype), usertype["module"], topn, simmodel = simmodel, eval = eval)
-                        tg.passTypes(debug = False)
+                        tg.passTypes(debug = False, incremental = True)
                         new_types = tg.findHotTypes()
                         changed = detectChange(types, new_types)
                     tg.simplifyTypes()
@@ -585,6 +745,347 @@ def transformDataset(jsonrepo, outputdir = None):
     return output_gtfile, output_detailedgtfile
 
 
+#similarity model shared by all files handled in the current (worker) process
+worker_simmodel = None
+
+def initinferworker(simmodel, cachedir = None, tdgcachedir = None, summarycachedir = None):
+    global worker_simmodel
+    worker_simmodel = simmodel
+    setModuleCacheDir(cachedir)
+    setTDGCacheDir(tdgcachedir)
+    setSummaryCacheDir(summarycachedir)
+
+
+def fingerprint(source, usertypes, recommendations, type4py, topn, summaries = None):
+    #inferred types of a file only depend on its source, its user-defined types, the summaries of its imported modules, the recommendations, the configurations and the code of HiTyper
+    data = json.dumps([getCodeVersion(), source, usertypes, recommendations, type4py, topn, config, summaries], sort_keys = True)
+    return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def streamkey(source, recommendations, type4py, topn):
+    #the inputs of a file known before inferring it, results of an interrupted run are only reused if their key is unchanged
+    data = json.dumps([getCodeVersion(), source, recommendations, type4py, topn, config], sort_keys = True)
+    return hashlib.sha256(data.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def inferfile(arg):
+    repo = arg[0]
+    f = arg[1]
+    recommendations = arg[2]
+    type4py = arg[3]
+    topn = arg[4]
+    #[fingerprint, inferred types, summary] of this file in the previous run
+    previous = arg[5]
+    #module path -> summary of the imported modules inferred before this file
+    summaries = arg[6]
+    simmodel = worker_simmodel
+    try:
+        #each file starts from an empty set of scanned modules so that its user-defined types do not depend on which files are analyzed before it
+        del scaned_files[:]
+        source = open(f, "r", encoding = "utf-8").read()
+        root = ast.parse(source)
+        usertypefinder = UsertypeFinder(f, repo, True)
+        usertypes, _ = usertypefinder.run(root)
+        imported = loadImportedSummaries(f, repo, root, summaries = summaries)
+        curfingerprint = fingerprint(source, usertypes, recommendations, type4py, topn, imported.summaries)
+        if previous != None and previous[0] == curfingerprint and previous[2] != None:
+            logger.info("Reused the inferred types of unchanged file {}".format(f))
+            saveModuleSummary(source, previous[2], imported.summaries)
+            return f, previous[1], curfingerprint, previous[2]
+        global_tg = buildTDG(f, source, usertypes, True, None, alias = 0, repo = None, root = root)
+        global_tg.importedsummaries = imported
+        str_results = {}
+        global_tg.passTypes(debug = False)
+        str_results["global@global"] = global_tg.dumptypes()
+        if recommendations == None and type4py:
+            recommendations = getRecommendations(source)
+        for tg in global_tg.scheduleTGs():
+            if recommendations != None:
+                changed = True
+                iters = 0
+                while changed and iters < config["max_recommendation_iteration"]:
+                    iters += 1
+                    tg.passTypes(debug = False, incremental = True)
+                    types = tg.findHotTypes()
+                    tg.recommendType(types, recommendations, formatUserTypes(usertypes), usertypes["module"], topn, simmodel = simmodel)
+                    tg.passTypes(debug = False, incremental = True)
+                    new_types = tg.findHotTypes()
+                    changed = detectChange(types, new_types)
+                    tg.simplifyTypes()
+            else:
+                tg.passTypes(debug = False)
+                tg.simplifyTypes()
+            str_results[tg.name] = tg.dumptypes()
+        summary = summarizeModule(global_tg)
+        saveModuleSummary(source, summary, imported.summaries)
+    except Exception as e:
+        traceback.print_exc()
+        logger.error("Type inference failed for file {}, reason: {}".format(f, e))
+        return f, None, None, None
+    return f, str_results, curfingerprint, summary
+
+def indexstream(streamfile):
+    #offsets of the complete lines in a JSON Lines result file, a line cut off by a crash is dropped so that the file can be appended again
+    index = {}
+    if not os.path.isfile(streamfile):
+        return index
+    end = 0
+    with open(streamfile, "rb+") as sf:
+        for line in sf:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                item = json.loads(line)
+            except ValueError:
+                break
+            index[item["file"]] = end
+            end += len(line)
+        sf.truncate(end)
+    return index
+
+
+def writestream(sf, f, results, fingerprint = None, summary = None, key = None):
+    item = {"file": f, "results": results}
+    if key != None:
+        item["key"] = key
+    if fingerprint != None:
+        item["fingerprint"] = fingerprint
+    if summary != None:
+        item["summary"] = summary
+    sf.write(json.dumps(item) + "\n")
+    sf.flush()
+
+
+def dumpstream(streamfile, outputfile, fingerprintfile = None):
+    #reassemble the classic output from a JSON Lines result file, one file is loaded at a time and the output is the same as dumping the whole dict
+    index = indexstream(streamfile)
+    fingerprints = {}
+    with open(streamfile, "rb") as sf, open(outputfile, "w", encoding = "utf-8") as of:
+        of.write("{")
+        for i, f in enumerate(sorted(index)):
+            sf.seek(index[f])
+            item = json.loads(sf.readline())
+            if "fingerprint" in item:
+                fingerprints[f] = [item["fingerprint"], item.get("summary")]
+            of.write(("," if i > 0 else "") + "\n    " + json.dumps(f) + ": " + json.dumps(item["results"], sort_keys=True, indent=4, separators=(',', ': ')).replace("\n", "\n    "))
+        of.write("\n}" if len(index) > 0 else "}")
+    if fingerprintfile != None:
+        with open(fingerprintfile, "w", encoding = "utf-8") as of:
+            of.write(json.dumps(fingerprints, sort_keys=True, indent=4, separators=(',', ': ')))
+
+
+def prefetchRecommendations(items):
+    #request the recommendations of all files in background, and only wait for them when each file is handed to inference
+    client = getRecommendationClient()
+    sources = {}
+    for item in items:
+        if item[2] == None:
+            try:
+                sources[item[1]] = open(item[1], "r", encoding = "utf-8").read()
+                client.request(sources[item[1]])
+            except Exception as e:
+                logger.warning("Cannot read file {} to request recommendations, reason: {}".format(item[1], e))
+    for item in items:
+        if item[1] in sources:
+            yield item[:2] + (client.get(sources.pop(item[1])),) + item[3:]
+        else:
+            yield item
+
+
+def resumestream(streamfile, levels, imports, levelof, keys):
+    #lines of an interrupted run that can be reused: their files are still analyzed and have unchanged keys, and so do the imported modules whose summaries they used
+    #other lines are removed from the stream file so that their files are inferred again, the stream file is only rewritten if some lines are removed
+    index = indexstream(streamfile)
+    if len(index) == 0:
+        return index
+    done = {}
+    lines = {}
+    with open(streamfile, "rb") as rf:
+        for level in levels:
+            for f in level:
+                if f not in index:
+                    continue
+                rf.seek(index[f])
+                line = rf.readline()
+                if keys.get(f) == None or json.loads(line).get("key") != keys[f]:
+                    continue
+                if any(d not in done for d in imports.get(f, []) if levelof[d] < levelof[f]):
+                    continue
+                done[f] = index[f]
+                lines[f] = line
+    if len(done) < len(index):
+        logger.info("Files changed since the interrupted run in {}, re-inferring {} files".format(streamfile, len(index) - len(done)))
+        tmpfile = "{}.{}.tmp".format(streamfile, os.getpid())
+        end = 0
+        with open(tmpfile, "wb") as tf:
+            for f in done:
+                tf.write(lines[f])
+                done[f] = end
+                end += len(lines[f])
+        os.replace(tmpfile, streamfile)
+    if len(done) > 0:
+        logger.info("Resumed from {}, skipped {} inferred files".format(streamfile, len(done)))
+    return done
+
+
+def inferfiles(files, repo, recommendations = None, type4py = False, topn = 1, simmodel = None, jobs = 1, previous = None, streamfile = None):
+    #previous: results and fingerprints of a previous run, files with unchanged fingerprints reuse their previous results
+    #streamfile: if given, results are appended to this JSON Lines file as soon as each file is inferred instead of being returned, files already in it with unchanged keys are skipped
+    #modules are inferred after the modules they import, so that the summaries of imported modules are ready before the modules importing them
+    levels, imports = orderModules(files, repo)
+    levelof = {}
+    for i, level in enumerate(levels):
+        for f in level:
+            levelof[f] = i
+    done = {}
+    keys = {}
+    if streamfile != None:
+        for f in levelof:
+            try:
+                source = open(f, "r", encoding = "utf-8").read()
+            except Exception:
+                keys[f] = None
+                continue
+            keys[f] = streamkey(source, recommendations.get(f) if isinstance(recommendations, dict) else None, type4py, topn)
+        done = resumestream(streamfile, levels, imports, levelof, keys)
+    items = []
+    for level in levels:
+        for f in level:
+            if f in done:
+                continue
+            #fingerprints are stored with the summaries, so that the modules importing a reused file still get its summary
+            if isinstance(previous, dict) and f in previous["results"] and isinstance(previous["fingerprints"].get(f), list):
+                prev = [previous["fingerprints"][f][0], previous["results"][f], previous["fingerprints"][f][1]]
+            else:
+                prev = None
+            if isinstance(recommendations, dict) and f in recommendations:
+                items.append((repo, f, recommendations[f], type4py, topn, prev))
+            else:
+                items.append((repo, f, None, type4py, topn, prev))
+    #modules only see the summaries of the imported modules outside their import cycle (which are in previous levels),
+    #so that the results do not depend on the order in which the modules are inferred
+    deps = {}
+    waiting = {}
+    dependents = {}
+    for item in items:
+        f = item[1]
+        deps[f] = [d for d in imports.get(f, []) if levelof[d] < levelof[f]]
+        waiting[f] = 0
+        for d in deps[f]:
+            if d not in done:
+                waiting[f] += 1
+                if d not in dependents:
+                    dependents[d] = []
+                dependents[d].append(f)
+
+    #module path -> summary of the inferred modules, files skipped from an interrupted run use the summaries stored with their results
+    summaries = {}
+    if len(done) > 0:
+        with open(streamfile, "rb") as rf:
+            for f in done:
+                rf.seek(done[f])
+                item = json.loads(rf.readline())
+                if item.get("summary") != None:
+                    summaries[f] = item["summary"]
+    results = {}
+    fingerprints = {}
+    sf = open(streamfile, "a", encoding = "utf-8") if streamfile != None else None
+    #worker processes are forked before any request thread is started
+    initargs = (simmodel, hityper.usertype_finder.module_cache_dir, hityper.tdg_binary.tdg_cache_dir, hityper.module_summary.summary_cache_dir)
+    if jobs > 1:
+        pool = ProcessPool(jobs, initializer = initinferworker, initargs = initargs)
+    else:
+        pool = None
+        initinferworker(*initargs)
+    tasks = prefetchRecommendations(items) if type4py else iter(items)
+    fetched = {}
+
+    def gettask(f):
+        #recommendations are prefetched in the order of items, so take items until the one of f is reached
+        while f not in fetched:
+            item = next(tasks)
+            fetched[item[1]] = item
+        deps_summaries = {}
+        for d in deps[f]:
+            if d in summaries:
+                deps_summaries[d] = summaries[d]
+        return fetched.pop(f) + (deps_summaries,)
+
+    #each file is handed to a worker as soon as the modules it depends on are inferred, instead of waiting for whole levels
+    #at most one file per worker is handed out at a time, and files that other files wait on go first since they gate the import chains
+    order = {}
+    for i, item in enumerate(items):
+        order[item[1]] = i
+    ready = []
+    for item in items:
+        if waiting[item[1]] == 0:
+            heapq.heappush(ready, (-len(dependents.get(item[1], [])), order[item[1]], item[1]))
+    finished = queue.Queue()
+    running = 0
+    progress = tqdm(total = len(items))
+    while len(ready) > 0 or running > 0:
+        while len(ready) > 0 and running < max(jobs, 1):
+            task = gettask(heapq.heappop(ready)[2])
+            if pool != None:
+                pool.apply_async(inferfile, (task,), callback = finished.put, error_callback = finished.put)
+            else:
+                finished.put(inferfile(task))
+            running += 1
+        output = finished.get()
+        running -= 1
+        if isinstance(output, BaseException):
+            raise output
+        f, str_results, curfingerprint, summary = output
+        progress.update(1)
+        if summary != None:
+            summaries[f] = summary
+        for g in dependents.get(f, []):
+            waiting[g] -= 1
+            if waiting[g] == 0:
+                heapq.heappush(ready, (-len(dependents.get(g, [])), order[g], g))
+        if str_results == None:
+            continue
+        if sf != None:
+            writestream(sf, f, str_results, curfingerprint, summary, keys[f])
+        else:
+            results[f] = str_results
+            fingerprints[f] = [curfingerprint, summary]
+    progress.close()
+    if pool != None:
+        pool.close()
+        pool.join()
+    if type4py:
+        closeRecommendationClient()
+    if sf != None:
+        sf.close()
+
+    return results, fingerprints
+
+
+def alarmhandler(signum, frame):
+    raise FunctionTimedOut("Task is interrupted by the timer")
+
+
+def runwithtimeout(func, timeout, *args):
+    #a timer signal interrupts the task in the worker process itself, threads are only used where signals are not available
+    if timeout == None:
+        return func(*args)
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        return func_timeout(timeout, func, args = args)
+    prev_handler = signal.signal(signal.SIGALRM, alarmhandler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, prev_handler)
+
+
+def initusertypeworker(cachedir = None):
+    #module analysis and repository indexes are cached per worker and reused by all files it handles
+    setModuleCacheDir(cachedir)
+
+
 def collectusertype(arg):
     filerepo = arg[0]
     f = arg[1]
@@ -593,18 +1094,21 @@ def collectusertype(arg):
     if not os.path.isfile(filepath):
         logger.error("Cannot find source file {}".format(filepath))
         return f, None
+    #scanned modules are tracked per file, otherwise the result of a file depends on the files handled before it in the same worker
+    del scaned_files[:]
     try:
         source = open(filepath, "r").read()
         root = ast.parse(source)
         usertypeanalyzer = UsertypeFinder(filepath, projpath, True)
-        usertypes, subtypes = usertypeanalyzer.invoke(root)
+        usertypes, subtypes = runwithtimeout(usertypeanalyzer.run, config["usertype_timeout"], root)
     except FunctionTimedOut as e:
         logger.warning("Timeout! Switch to NOT validate imported types!")
+        del scaned_files[:]
         try:
             source = open(filepath, "r").read()
             root = ast.parse(source)
             usertypeanalyzer = UsertypeFinder(filepath, projpath, False)
-            usertypes, subtypes = usertypeanalyzer.invoke(root)
+            usertypes, subtypes = runwithtimeout(usertypeanalyzer.run, config["usertype_timeout"], root)
         except FunctionTimedOut as e:
             logger.warning("Timeout! Skipped...")
             return f, None
@@ -618,7 +1122,8 @@ def collectusertype(arg):
         return f, None
     return f, usertypes
 
-def collectUserTypeset(datafile, filerepo = None, cores = 8, outputdir = None):
+def collectUserTypeset(datafile, filerepo = None, cores = 8, outputdir = None, stream = False):
+    #stream: append the user-defined types of each file to USERTYPES.jsonl as soon as they are collected, and resume from it if a previous run is interrupted
     with open(datafile, "r", encoding = "utf-8") as df:
         jsondata = json.loads(df.read())
     
@@ -627,23 +1132,44 @@ def collectUserTypeset(datafile, filerepo = None, cores = 8, outputdir = None):
     else:
         fs = jsondata
 
+    outputfile = os.path.join(outputdir, "USERTYPES.json") if outputdir != None else "USERTYPES.json"
+    streamfile = outputfile + "l" if stream else None
+    done = indexstream(streamfile) if stream else {}
+    if len(done) > 0:
+        logger.info("Resumed from {}, skipped {} processed files".format(streamfile, len(done)))
+
     items = []
     for i, f in enumerate(fs):
-        items.append((filerepo, f, i))
+        if f not in done:
+            items.append((filerepo, f, i))
     
-    pool = ThreadPool(cores)
-    results = pool.map(collectusertype, items)
-    pool.close()
-    pool.join()
-
     data = {}
-
-
-    for i in results:
-        if i[1] != None:
-            data[i[0]] = i[1]
+    sf = open(streamfile, "a", encoding = "utf-8") if stream else None
+    if cores > 1:
+        #hand out files in chunks to cut down the inter-process communication, but keep chunks small enough to balance the load
+        chunksize = max(1, len(items) // (cores * 16))
+        pool = ProcessPool(cores, initializer = initusertypeworker, initargs = (hityper.usertype_finder.module_cache_dir, ))
+        outputs = pool.imap_unordered(collectusertype, items, chunksize = chunksize)
+    else:
+        pool = None
+        initusertypeworker(hityper.usertype_finder.module_cache_dir)
+        outputs = map(collectusertype, items)
+    for f, usertypes in tqdm(outputs, total = len(items)):
+        if usertypes == None:
+            continue
+        if sf != None:
+            writestream(sf, f, usertypes)
+        else:
+            data[f] = usertypes
+    if pool != None:
+        pool.close()
+        pool.join()
     
-    outputfile = os.path.join(outputdir, "USERTYPES.json") if outputdir != None else "USERTYPES.json"
-    with open(outputfile, "w", encoding = "utf-8") as jf:
-        jf.write(json.dumps(data, sort_keys=True, indent=4, separators=(',', ': ')))
+    if sf != None:
+        sf.close()
+        dumpstream(streamfile, outputfile)
+        os.remove(streamfile)
+    else:
+        with open(outputfile, "w", encoding = "utf-8") as jf:
+            jf.write(json.dumps(data, sort_keys=True, indent=4, separators=(',', ': ')))
     return outputfile
\ No newline at end of file
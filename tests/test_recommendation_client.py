@@ -0,0 +1,104 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from hityper.utils import RecommendationClient
+
+
+#a Type4Py response with one predicted return type
+RESPONSE = {"response": {"classes": [], "funcs": [{"q_name": "f", "ret_type_p": [["int", 0.9]]}], "variables_p": {}}, "error": None}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    #the path selects the behaviour: /ok answers, /flaky fails with 503 before answering, /bad rejects every request with 400
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(self.path)
+        if self.path == "/bad" or (self.path == "/flaky" and self.server.requests.count("/flaky") <= self.server.failures):
+            self.send_response(400 if self.path == "/bad" else 503)
+            self.end_headers()
+            return
+        body = json.dumps(RESPONSE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.requests = []
+    httpd.failures = 2
+    thread = threading.Thread(target = httpd.serve_forever, daemon = True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def geturl(server, path):
+    return "http://127.0.0.1:{}{}".format(server.server_address[1], path)
+
+
+def getreturntype(rec):
+    return rec["global"]["f"]["annotations"][0]["type"]
+
+
+def test_response_is_parsed(server):
+    client = RecommendationClient(geturl(server, "/ok"))
+    assert getreturntype(client.get("def f():\n    return 1\n")) == ["int"]
+    client.close()
+
+
+def test_identical_sources_are_requested_once(server):
+    client = RecommendationClient(geturl(server, "/ok"))
+    futures = [client.request("x = 1\n") for i in range(0, 5)]
+    assert all(f is futures[0] for f in futures)
+    client.get("x = 1\n")
+    client.close()
+    assert server.requests == ["/ok"]
+
+
+def test_responses_are_cached_across_clients(server, tmp_path):
+    client = RecommendationClient(geturl(server, "/ok"), cachedir = str(tmp_path))
+    client.get("x = 1\n")
+    client.close()
+    client = RecommendationClient(geturl(server, "/ok"), cachedir = str(tmp_path))
+    assert getreturntype(client.get("x = 1\n")) == ["int"]
+    client.close()
+    assert server.requests == ["/ok"]
+
+
+def test_server_errors_are_retried(server, monkeypatch):
+    monkeypatch.setattr("hityper.utils.time.sleep", lambda seconds: None)
+    client = RecommendationClient(geturl(server, "/flaky"), retries = 3)
+    assert getreturntype(client.get("x = 1\n")) == ["int"]
+    client.close()
+    assert server.requests == ["/flaky"] * 3
+
+
+def test_rejected_requests_are_not_retried(server, monkeypatch):
+    monkeypatch.setattr("hityper.utils.time.sleep", lambda seconds: None)
+    client = RecommendationClient(geturl(server, "/bad"), retries = 3)
+    assert client.get("x = 1\n") == None
+    client.close()
+    assert server.requests == ["/bad"]
+
+
+def test_connection_errors_are_retried(server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("hityper.utils.time.sleep", lambda seconds: sleeps.append(seconds))
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    client = RecommendationClient("http://127.0.0.1:{}/ok".format(port), retries = 2)
+    assert client.get("x = 1\n") == None
+    client.close()
+    assert sleeps == [0.5, 1.0]
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from hityper.utils import inferfiles, dumpstream
+
+
+#b.py imports a.py, so the types inferred for b.py depend on the summary of a.py
+SOURCES = {
+    "a.py": "def make():\n    return 1\n",
+    "b.py": "from a import make\n\ndef use():\n    x = make()\n    return x\n",
+    "c.py": "def name():\n    return 'c'\n",
+}
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    for name, source in SOURCES.items():
+        (path / name).write_text(source)
+    return path
+
+
+def getfiles(repo):
+    return sorted(str(repo / name) for name in SOURCES)
+
+
+def infer(repo, outputdir, topn = 1, streamfile = None, dump = True):
+    #a run of infer -p -o, returns the results it dumps, dump = False leaves the stream file behind as an interrupted run does
+    streamfile = streamfile if streamfile != None else str(outputdir / "results.jsonl")
+    inferfiles(getfiles(repo), str(repo), topn = topn, streamfile = streamfile)
+    if not dump:
+        return None
+    dumpstream(streamfile, str(outputdir / "results.json"))
+    with open(str(outputdir / "results.json"), "r", encoding = "utf-8") as f:
+        return json.loads(f.read())
+
+
+def getlines(streamfile):
+    with open(streamfile, "r", encoding = "utf-8") as f:
+        return [json.loads(line)["file"] for line in f]
+
+
+def getkeys(streamfile):
+    #keys of the complete lines
+    with open(streamfile, "r", encoding = "utf-8") as f:
+        return [json.loads(line)["key"] for line in f if line.endswith("\n")]
+
+
+def interrupt(repo, tmp_path):
+    #an interrupted run leaves complete lines and a line cut off in the middle
+    streamfile = str(tmp_path / "results.jsonl")
+    infer(repo, tmp_path, dump = False)
+    with open(streamfile, "a", encoding = "utf-8") as f:
+        f.write('{"file": "')
+    return streamfile
+
+
+def cold(repo, tmp_path, topn = 1):
+    outputdir = tmp_path / "cold"
+    outputdir.mkdir()
+    return infer(repo, outputdir, topn = topn)
+
+
+def test_resume_skips_unchanged_files(repo, tmp_path):
+    streamfile = interrupt(repo, tmp_path)
+    assert infer(repo, tmp_path) == cold(repo, tmp_path)
+    assert sorted(getlines(streamfile)) == getfiles(repo)
+
+
+def test_resume_reinfers_edited_files_and_their_importers(repo, tmp_path):
+    streamfile = interrupt(repo, tmp_path)
+    (repo / "a.py").write_text("def make():\n    return 'a'\n")
+    results = infer(repo, tmp_path)
+    assert results == cold(repo, tmp_path)
+    assert results[str(repo / "b.py")]["use@global"][-1]["type"] == ["typing.Text"]
+    #each file has one line, c.py is reused and the others are inferred again
+    assert getlines(streamfile) == [str(repo / "c.py"), str(repo / "a.py"), str(repo / "b.py")]
+
+
+def test_resume_reinfers_files_with_other_options(repo, tmp_path):
+    streamfile = interrupt(repo, tmp_path)
+    keys = getkeys(streamfile)
+    assert infer(repo, tmp_path, topn = 3) == cold(repo, tmp_path, topn = 3)
+    #every line is written again with the key of the new options
+    assert len(getkeys(streamfile)) == len(SOURCES)
+    assert len(set(keys) & set(getkeys(streamfile))) == 0
@@ -0,0 +1,165 @@
+import random
+from copy import deepcopy
+
+import pytest
+
+from hityper.typeobject import TypeObject
+from hityper.stdtypes import exporttypemap
+
+
+#random nested types, seeded so that every run checks the same cases
+LEAVES = [("int", 0), ("bool", 0), ("float", 0), ("Text", 0), ("bytes", 0), ("None", 0), ("Any", 0), ("Foo", 2), ("Bar", 2), ("datetime.datetime", 1)]
+GENERICS = ["List", "Set", "Tuple", "Dict", "Callable", "Optional", "Union", "Iterable", "Generator", "Sequence", "Awaitable"]
+
+
+def randtype(rng, depth):
+    if depth == 0 or rng.random() < 0.4:
+        t = TypeObject(*rng.choice(LEAVES))
+        return t
+    t = TypeObject(rng.choice(GENERICS), 0)
+    if t.type in ["Dict", "Callable"]:
+        t.keytype = [randtype(rng, depth - 1) for i in range(0, rng.randint(0, 2))]
+        t.valuetype = [randtype(rng, depth - 1) for i in range(0, rng.randint(0, 2))]
+        t.elementtype = t.keytype
+    else:
+        t.elementtype = [randtype(rng, depth - 1) for i in range(0, rng.randint(0, 3))]
+    return t
+
+
+def randtypes(seed):
+    rng = random.Random(seed)
+    types = [randtype(rng, 3) for i in range(0, rng.randint(1, 12))]
+    #repeat some types so that the lists contain identical and included types
+    for i in range(0, rng.randint(0, 4)):
+        types.append(deepcopy(rng.choice(types)))
+    rng.shuffle(types)
+    return types
+
+
+def referenceRemoveInclusiveTypes(listt):
+    #removeInclusiveTypes before types were indexed by their heads
+    outs = TypeObject.removeRedundantTypes(listt)
+    removed = True
+    while removed:
+        removed = False
+        for i in range(0, len(outs)):
+            for j in range(0, len(outs)):
+                if i != j and TypeObject.isIncluded(outs[i], outs[j]):
+                    removed = True
+                    target = outs[i]
+                    break
+        if removed and target in outs:
+            outs.remove(target)
+    return outs
+
+
+def referenceTypeName(t):
+    #resolveTypeName before names were cached by signatures, it modifies t
+    t = TypeObject.removeInvalidTypes(t)
+    t = TypeObject.simplifyGenericType(t)
+    if t.category != 0:
+        return t.type
+    elif t.type.lower() not in exporttypemap:
+        raise TypeError("Unknown type: " + t.type)
+    typestr = exporttypemap[t.type.lower()]
+    if t.type.lower() in ["dict", "callable"] and len(t.keytype) + len(t.valuetype) > 0:
+        typestr = typestr + "["
+        if len(t.keytype) == 0:
+            typestr += ", "
+        elif len(t.keytype) == 1:
+            typestr = typestr + referenceTypeName(t.keytype[0]) + ", "
+        else:
+            typestr += "typing.Union["
+            for n in t.keytype:
+                typestr = typestr + referenceTypeName(n) + ","
+            typestr = typestr[:-1]
+            typestr += "], "
+        if len(t.valuetype) == 0:
+            pass
+        elif len(t.valuetype) == 1:
+            typestr = typestr + referenceTypeName(t.valuetype[0])
+        else:
+            typestr += "typing.Union["
+            for n in t.valuetype:
+                typestr = typestr + referenceTypeName(n) + ","
+            typestr = typestr[:-1]
+            typestr += "]"
+        typestr += "]"
+    elif t.type.lower() in ["set", "tuple", "list", "awaitable", "iterable", "sequence", "generator"] and len(t.elementtype) > 0:
+        typestr = typestr + "["
+        if len(t.elementtype) == 1:
+            typestr = typestr + referenceTypeName(t.elementtype[0])
+        elif len(t.elementtype) == 2 and (t.elementtype[0].type == "None" or t.elementtype[1].type == "None"):
+            typestr += "typing.Optional["
+            for i in t.elementtype:
+                if i.type != "None":
+                    typestr = typestr + referenceTypeName(i)
+            typestr += "]"
+        elif len(t.elementtype) >= 2:
+            typestr += "typing.Union["
+            for n in t.elementtype:
+                typestr = typestr + referenceTypeName(n) + ","
+            typestr = typestr[:-1]
+            typestr += "]"
+        typestr += "]"
+    elif t.type.lower() == "optional" and len(t.elementtype) > 0:
+        typestr += "["
+        if len(t.elementtype) > 1:
+            typestr += "typing.Union["
+            for n in t.elementtype:
+                typestr = typestr + referenceTypeName(n) + ","
+            typestr = typestr[:-1]
+            typestr += "]"
+        elif len(t.elementtype) == 1:
+            typestr = typestr + referenceTypeName(t.elementtype[0]) + "]"
+        else:
+            typestr += "]"
+    elif t.type.lower() == "union" and len(t.elementtype) > 0:
+        typestr += "["
+        if len(t.elementtype) == 1:
+            typestr = typestr + referenceTypeName(t.elementtype[0]) + "]"
+        elif len(t.elementtype) > 1:
+            for n in t.elementtype:
+                typestr = typestr + referenceTypeName(n) + ","
+            typestr = typestr[:-1]
+            typestr += "]"
+    return typestr
+
+
+def getSignatures(types):
+    return [TypeObject.getSignature(t) for t in types]
+
+
+@pytest.mark.parametrize("seed", range(0, 2000))
+def test_removeInclusiveTypes_matches_reference(seed):
+    types = randtypes(seed)
+    try:
+        expected = getSignatures(referenceRemoveInclusiveTypes(deepcopy(types)))
+    except Exception:
+        #the reference fails on some malformed nested types, such cases are not comparable
+        return
+    assert getSignatures(TypeObject.removeInclusiveTypes(deepcopy(types))) == expected
+
+
+def test_removeInclusiveTypes_removes_included_generics():
+    listint = TypeObject("List", 0)
+    listint.elementtype = [TypeObject("int", 0)]
+    types = [TypeObject("List", 0), listint, TypeObject("int", 0), TypeObject("Optional", 0)]
+    types[3].elementtype = [TypeObject("int", 0)]
+    #List is included in List[int], and int in Optional[int]
+    assert getSignatures(TypeObject.removeInclusiveTypes(types)) == getSignatures([types[1], types[3]])
+
+
+@pytest.mark.parametrize("seed", range(0, 2000))
+def test_resolveTypeName_matches_reference(seed):
+    for t in randtypes(seed):
+        try:
+            expected = referenceTypeName(deepcopy(t))
+        except Exception:
+            continue
+        signature = TypeObject.getSignature(t)
+        assert TypeObject.resolveTypeName(t) == expected
+        #the second call is served by the cache
+        assert TypeObject.resolveTypeName(t) == expected
+        #rendering a name does not modify the type
+        assert TypeObject.getSignature(t) == signature